@@ -46,7 +46,34 @@ Explanation:
         References a shared TreeType object instead of duplicating it.
     4. Usage (Forest)
         Creates trees efficiently, reusing shared tree types.
+    5. Spatial Index (GridIndex)
+        Optional uniform grid kept up to date by Forest.plant_tree.
+        Answers "trees in this viewport" and "nearest N trees" without scanning every tree.
+    6. Persistence (Forest.save / Forest.open)
+        Binary file: header, flyweight type table, then packed x / y / type-id columns.
+        Forest.open memory-maps the file, so trees are decoded on access instead of parsed up front.
+    7. Batched Rendering (ForestRenderer)
+        Produces the same text as Forest.display, but formats each tree type's prefix once and
+        writes large chunks to a single sink instead of two print() calls per tree.
+    8. Bulk Loading (Forest.load_stream)
+        Parses CSV / JSONL rows in a process pool; each chunk comes back with its own small type
+        table, so TreeFactory is consulted once per distinct type per chunk instead of once per row.
 """
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+import csv
+import heapq
+import itertools
+import io
+import json
+import mmap
+import os
+import pickle
+import random
+import struct
+import sys
+import time
 
 class TreeType:
     """Flyweight class that stores shared (intrinsic) data."""
@@ -71,6 +98,8 @@ class TreeFactory:
 
 # Client: Uses shared TreeType objects while keeping unique position data
 class Tree:
+    __slots__ = ("x", "y", "tree_type")  # Millions of trees: no per-instance __dict__
+
     def __init__(self, x, y, tree_type):
         self.x = x
         self.y = y
@@ -80,20 +109,490 @@ class Tree:
         print(f"  ID of Tree Type: {id(self.tree_type)}")
         self.tree_type.display(self.x, self.y)
 
+# Spatial Index: Buckets trees by grid cell so queries only touch nearby cells
+class GridIndex:
+    """Uniform grid index over tree positions, updated incrementally on insert."""
+    def __init__(self, cell_size=10):
+        self.cell_size = cell_size
+        self._cells: dict[tuple, list[Tree]] = {}
+        self._bounds = None  # (min_cx, min_cy, max_cx, max_cy) of occupied cells
+
+    def _cell(self, x, y):
+        return int(x // self.cell_size), int(y // self.cell_size)
+
+    def insert(self, tree):
+        key = self._cell(tree.x, tree.y)
+        bucket = self._cells.get(key)
+        if bucket is not None:
+            bucket.append(tree)
+            return
+        self._cells[key] = [tree]
+        cx, cy = key
+        if self._bounds is None:
+            self._bounds = (cx, cy, cx, cy)
+        else:
+            min_cx, min_cy, max_cx, max_cy = self._bounds
+            self._bounds = (min(min_cx, cx), min(min_cy, cy), max(max_cx, cx), max(max_cy, cy))
+
+    def query_rect(self, x_min, y_min, x_max, y_max):
+        """Return all trees with x_min <= x <= x_max and y_min <= y <= y_max."""
+        if self._bounds is None:
+            return []
+        min_cx, min_cy, max_cx, max_cy = self._bounds
+        cx0, cy0 = self._cell(x_min, y_min)
+        cx1, cy1 = self._cell(x_max, y_max)
+        cx0, cy0 = max(cx0, min_cx), max(cy0, min_cy)
+        cx1, cy1 = min(cx1, max_cx), min(cy1, max_cy)
+        cells = self._cells
+        result = []
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = cells.get((cx, cy))
+                if bucket:
+                    result.extend(tree for tree in bucket
+                                  if x_min <= tree.x <= x_max and y_min <= tree.y <= y_max)
+        return result
+
+    def _ring(self, cx, cy, r):
+        """Cells at Chebyshev distance exactly r from (cx, cy), clipped to the occupied bounds."""
+        min_cx, min_cy, max_cx, max_cy = self._bounds
+        x0, x1 = max(cx - r, min_cx), min(cx + r, max_cx)
+        for row in ((cy - r, cy + r) if r else (cy,)):
+            if min_cy <= row <= max_cy:
+                for col in range(x0, x1 + 1):
+                    yield col, row
+        y0, y1 = max(cy - r + 1, min_cy), min(cy + r - 1, max_cy)
+        for col in ((cx - r, cx + r) if r else ()):
+            if min_cx <= col <= max_cx:
+                for row in range(y0, y1 + 1):
+                    yield col, row
+
+    def nearest(self, x, y, n=1):
+        """Return up to n trees closest to (x, y), nearest first."""
+        if n <= 0 or self._bounds is None:
+            return []
+        min_cx, min_cy, max_cx, max_cy = self._bounds
+        cx, cy = self._cell(x, y)
+        first_ring = max(min_cx - cx, cx - max_cx, min_cy - cy, cy - max_cy, 0)  # Rings before miss the bounds
+        last_ring = max(abs(cx - min_cx), abs(cx - max_cx), abs(cy - min_cy), abs(cy - max_cy))
+        cells = self._cells
+        best = []  # Max-heap of (-distance², id, tree) holding the n best so far
+
+        def consider(bucket):
+            for tree in bucket:
+                d2 = (tree.x - x) ** 2 + (tree.y - y) ** 2
+                if len(best) < n:
+                    heapq.heappush(best, (-d2, id(tree), tree))
+                elif d2 < -best[0][0]:
+                    heapq.heapreplace(best, (-d2, id(tree), tree))
+
+        for r in range(first_ring, last_ring + 1):
+            if 8 * r > len(cells):
+                # A ring would visit more cells than are occupied (sparse forest): scan the occupied ones
+                best.clear()
+                for bucket in cells.values():
+                    consider(bucket)
+                break
+            for key in self._ring(cx, cy, r):
+                bucket = cells.get(key)
+                if bucket:
+                    consider(bucket)
+            # Every cell in ring r + 1 is at least r * cell_size away from (x, y)
+            reach = r * self.cell_size
+            if len(best) == n and -best[0][0] <= reach * reach:
+                break
+        return [tree for _, _, tree in sorted(best, reverse=True)]
+
+# Persistence: Read-only view over a memory-mapped forest file
+#   header  : magic, version, byte order, type count, tree count, type table size (FOREST_HEADER)
+#   types   : JSON list of [name, color, texture], padded to 8 bytes
+#   columns : x as float64[tree count], y as float64[tree count], type id as uint32[tree count]
+FOREST_MAGIC = b"FRST"
+FOREST_VERSION = 1
+FOREST_HEADER = struct.Struct("<4sHcxIQQ")
+
+def _align8(offset):
+    return (offset + 7) & ~7
+
+class MappedTrees:
+    """Sequence of Tree objects decoded on demand from a mapped forest file."""
+    def __init__(self, path):
+        with open(path, "rb") as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, byte_order, type_count, count, types_size = FOREST_HEADER.unpack_from(self._mmap)
+        if magic != FOREST_MAGIC or version != FOREST_VERSION:
+            raise ValueError(f"{path} is not a version {FOREST_VERSION} forest file")
+        if byte_order.decode() != sys.byteorder[0]:
+            raise ValueError(f"{path} was written on a machine with a different byte order")
+
+        offset = FOREST_HEADER.size
+        type_keys = json.loads(self._mmap[offset:offset + types_size])
+        self._types = [TreeFactory.get_tree_type(*key) for key in type_keys]
+        assert len(self._types) == type_count
+
+        view = memoryview(self._mmap)
+        offset = _align8(offset + types_size)
+        self._xs = view[offset:offset + 8 * count].cast("d")
+        offset += 8 * count
+        self._ys = view[offset:offset + 8 * count].cast("d")
+        offset += 8 * count
+        self._type_ids = view[offset:offset + 4 * count].cast("I")
+        self._count = count
+        self._extra: list[Tree] = []  # Trees planted after opening live in memory only
+
+    def __len__(self):
+        return self._count + len(self._extra)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("tree index out of range")
+        if index >= self._count:
+            return self._extra[index - self._count]
+        return Tree(self._xs[index], self._ys[index], self._types[self._type_ids[index]])
+
+    def __iter__(self):
+        types = self._types
+        for x, y, type_id in zip(self._xs, self._ys, self._type_ids):
+            yield Tree(x, y, types[type_id])
+        yield from self._extra
+
+    def append(self, tree):
+        self._extra.append(tree)
+
+    def extend(self, trees):
+        self._extra.extend(trees)
+
+    def close(self):
+        for column in (self._xs, self._ys, self._type_ids):
+            column.release()
+        self._mmap.close()
+
+# Batched Rendering: Same text as Tree.display, written in chunks
+class ForestRenderer:
+    """Streams Forest.display-equivalent output as byte chunks or into one buffered sink."""
+    def __init__(self, chunk_size=10_000, group_by_type=False):
+        self.chunk_size = chunk_size  # Trees formatted per chunk
+        self.group_by_type = group_by_type  # Emit trees type by type instead of planting order
+
+    @staticmethod
+    def _prefix(tree_type):
+        return (f"  ID of Tree Type: {id(tree_type)}\n"
+                f"Tree '{tree_type.name}' with color: {tree_type.color}, texture: {tree_type.texture} at (")
+
+    def _ordered(self, trees):
+        prefixes: dict[int, str] = {}
+        for tree in trees:
+            tree_type = tree.tree_type
+            prefix = prefixes.get(id(tree_type))
+            if prefix is None:
+                prefix = prefixes[id(tree_type)] = self._prefix(tree_type)
+            yield prefix, tree
+
+    def _grouped(self, trees):
+        groups: dict[int, list[Tree]] = {}
+        for tree in trees:
+            groups.setdefault(id(tree.tree_type), []).append(tree)
+        for group in groups.values():
+            prefix = self._prefix(group[0].tree_type)
+            for tree in group:
+                yield prefix, tree
+
+    def iter_chunks(self, trees):
+        """Yield UTF-8 encoded chunks of at most chunk_size trees each."""
+        pairs = self._grouped(trees) if self.group_by_type else self._ordered(trees)
+        parts = []
+        for prefix, tree in pairs:
+            parts.append(f"{prefix}{tree.x}, {tree.y})\n")
+            if len(parts) >= self.chunk_size:
+                yield "".join(parts).encode()
+                parts.clear()
+        if parts:
+            yield "".join(parts).encode()
+
+    def render(self, trees, sink=None):
+        """Write all chunks to sink: a binary file, a text file (e.g. sys.stdout), or stdout by default."""
+        sink = sys.stdout if sink is None else sink
+        if isinstance(sink, io.TextIOBase):
+            if hasattr(sink, "buffer"):
+                sink.flush()  # Keep ordering with anything already printed
+                sink = sink.buffer
+            else:
+                for chunk in self.iter_chunks(trees):
+                    sink.write(chunk.decode())
+                return
+        for chunk in self.iter_chunks(trees):
+            sink.write(chunk)
+        sink.flush()
+
+# Bulk Loading: Parse a chunk of CSV / JSONL lines into a local type table plus packed columns
+TREE_FIELDS = ("x", "y", "name", "color", "texture")
+
+def _parse_chunk(lines, fmt):
+    local_ids: dict[tuple, int] = {}
+    xs, ys, ids = array("d"), array("d"), array("I")
+    if fmt == "jsonl":
+        rows = ([row[field] for field in TREE_FIELDS] for row in map(json.loads, filter(str.strip, lines)))
+    else:
+        rows = (row for row in csv.reader(lines) if row and row != list(TREE_FIELDS))
+    for x, y, name, color, texture in rows:
+        key = (name, color, texture)
+        type_id = local_ids.get(key)
+        if type_id is None:
+            type_id = local_ids[key] = len(local_ids)
+        xs.append(float(x))
+        ys.append(float(y))
+        ids.append(type_id)
+    return list(local_ids), xs, ys, ids
+
 # Forest: Manages all tree objects
 class Forest:
-    def __init__(self):
+    def __init__(self, spatial_index=None):
         self.trees: list[Tree] = []
+        self.spatial_index = spatial_index  # Optional GridIndex
 
     def plant_tree(self, x, y, name, color, texture):
         tree_type = TreeFactory.get_tree_type(name, color, texture)
         tree = Tree(x, y, tree_type)
         self.trees.append(tree)
+        if self.spatial_index is not None:
+            self.spatial_index.insert(tree)
+
+    def trees_in_region(self, x_min, y_min, x_max, y_max):
+        if self.spatial_index is not None:
+            return self.spatial_index.query_rect(x_min, y_min, x_max, y_max)
+        return [tree for tree in self.trees
+                if x_min <= tree.x <= x_max and y_min <= tree.y <= y_max]
+
+    def nearest_trees(self, x, y, n=1):
+        if self.spatial_index is not None:
+            return self.spatial_index.nearest(x, y, n)
+        return heapq.nsmallest(n, self.trees, key=lambda tree: (tree.x - x) ** 2 + (tree.y - y) ** 2)
 
     def display(self):
         for tree in self.trees:
             tree.display()
 
+    def render(self, sink=None, group_by_type=False, chunk_size=10_000):
+        """Batched equivalent of display(); see ForestRenderer."""
+        ForestRenderer(chunk_size, group_by_type).render(self.trees, sink)
+
+    def save(self, path):
+        """Write the forest in the binary layout read by Forest.open."""
+        type_ids: dict[int, int] = {}  # id(TreeType) -> index in the type table
+        type_keys = []
+        xs, ys, ids = array("d"), array("d"), array("I")
+        for tree in self.trees:
+            tree_type = tree.tree_type
+            type_id = type_ids.get(id(tree_type))
+            if type_id is None:
+                type_id = type_ids[id(tree_type)] = len(type_keys)
+                type_keys.append([tree_type.name, tree_type.color, tree_type.texture])
+            xs.append(tree.x)
+            ys.append(tree.y)
+            ids.append(type_id)
+
+        types_blob = json.dumps(type_keys).encode()
+        header = FOREST_HEADER.pack(FOREST_MAGIC, FOREST_VERSION, sys.byteorder[0].encode(),
+                                    len(type_keys), len(xs), len(types_blob))
+        with open(path, "wb") as file:
+            file.write(header)
+            file.write(types_blob)
+            file.write(b"\0" * (_align8(len(header) + len(types_blob)) - len(header) - len(types_blob)))
+            xs.tofile(file)
+            ys.tofile(file)
+            ids.tofile(file)
+
+    def load_stream(self, source, workers=1, fmt=None, chunk_size=50_000):
+        """
+        Plant every row of a CSV (x,y,name,color,texture) or JSONL source.
+        source is a path or an iterable of lines; at most 2 * workers chunks are in flight,
+        so memory stays bounded however large the input is.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            fmt = fmt or ("jsonl" if str(source).endswith((".jsonl", ".json")) else "csv")
+            with open(source, newline="") as file:
+                self._load_lines(file, workers, fmt, chunk_size)
+        else:
+            self._load_lines(source, workers, fmt or "csv", chunk_size)
+
+    def _load_lines(self, lines, workers, fmt, chunk_size):
+        lines = iter(lines)
+        chunks = iter(lambda: list(itertools.islice(lines, chunk_size)), [])
+        if workers <= 1:
+            for chunk in chunks:
+                self._merge_chunk(*_parse_chunk(chunk, fmt))
+            return
+        with ProcessPoolExecutor(workers) as pool:
+            pending = deque()
+            for chunk in chunks:
+                pending.append(pool.submit(_parse_chunk, chunk, fmt))
+                if len(pending) >= 2 * workers:
+                    self._merge_chunk(*pending.popleft().result())
+            while pending:
+                self._merge_chunk(*pending.popleft().result())
+
+    def _merge_chunk(self, type_keys, xs, ys, ids):
+        """Map a chunk's local type ids onto shared flyweights and plant its trees."""
+        tree_types = [TreeFactory.get_tree_type(*key) for key in type_keys]
+        new_trees = [Tree(x, y, tree_types[type_id]) for x, y, type_id in zip(xs, ys, ids)]
+        self.trees.extend(new_trees)
+        if self.spatial_index is not None:
+            for tree in new_trees:
+                self.spatial_index.insert(tree)
+
+    @classmethod
+    def open(cls, path, spatial_index=None):
+        """Memory-map a saved forest; an optional spatial index is built by reading every tree."""
+        forest = cls(spatial_index)
+        forest.trees = MappedTrees(path)
+        if spatial_index is not None:
+            for tree in forest.trees:
+                spatial_index.insert(tree)
+        return forest
+
+# Benchmark: grid index vs linear scan
+def _time_per_call(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+def benchmark_spatial_index(sizes=(1_000_000, 10_000_000), world=10_000, cell_size=10):
+    for size in sizes:
+        rng = random.Random(42)
+        indexed = Forest(GridIndex(cell_size))
+        linear = Forest()
+        for _ in range(size):
+            x, y = rng.uniform(0, world), rng.uniform(0, world)
+            indexed.plant_tree(x, y, "Oak", "Green", "Rough")
+        linear.trees = indexed.trees  # Same trees, no index
+
+        vx, vy = world / 2, world / 2
+        viewport = (vx, vy, vx + 100, vy + 100)
+        grid_rect = _time_per_call(lambda: indexed.trees_in_region(*viewport), 1000)
+        scan_rect = _time_per_call(lambda: linear.trees_in_region(*viewport), 3)
+        grid_knn = _time_per_call(lambda: indexed.nearest_trees(vx, vy, 10), 1000)
+        scan_knn = _time_per_call(lambda: linear.nearest_trees(vx, vy, 10), 3)
+        print(f"{size:>11,} trees | viewport: grid {grid_rect * 1e6:8.1f} us, scan {scan_rect * 1e3:8.1f} ms"
+              f" | nearest 10: grid {grid_knn * 1e6:8.1f} us, scan {scan_knn * 1e3:8.1f} ms")
+
+# Benchmark: mmap open vs pickle load, each measured in a fresh process
+def _current_rss_mb():
+    with open("/proc/self/statm") as file:  # Linux: resident pages are the second field
+        return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+
+def _measure_load(loader, path, results):
+    rss_before = _current_rss_mb()
+    start = time.perf_counter()
+    trees = loader(path)
+    middle = trees[len(trees) // 2]  # Touch one tree so the forest is usable, not just opened
+    elapsed = time.perf_counter() - start
+    results.put((elapsed, _current_rss_mb() - rss_before, middle.tree_type.name))
+
+def _open_mapped(path):
+    return Forest.open(path).trees
+
+def _load_pickled(path):
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+def benchmark_persistence(size=50_000_000, directory="."):
+    import multiprocessing
+    rng = random.Random(42)
+    forest = Forest()
+    kinds = [("Oak", "Green", "Rough"), ("Pine", "Dark Green", "Smooth"), ("Birch", "White", "Papery")]
+    for _ in range(size):
+        forest.plant_tree(rng.uniform(0, 10_000), rng.uniform(0, 10_000), *rng.choice(kinds))
+
+    mapped_path = os.path.join(directory, "forest.bin")
+    pickled_path = os.path.join(directory, "forest.pkl")
+    forest.save(mapped_path)
+    with open(pickled_path, "wb") as file:
+        pickle.dump(forest.trees, file, protocol=pickle.HIGHEST_PROTOCOL)
+    del forest
+
+    context = multiprocessing.get_context("spawn")
+    for label, loader, path in (("mmap", _open_mapped, mapped_path), ("pickle", _load_pickled, pickled_path)):
+        results = context.Queue()
+        process = context.Process(target=_measure_load, args=(loader, path, results))
+        process.start()
+        elapsed, rss_mb, _ = results.get()
+        process.join()
+        print(f"{size:>11,} trees | {label:<6} open {elapsed * 1e3:10.1f} ms, RSS +{rss_mb:8.1f} MB,"
+              f" file {os.path.getsize(path) / 2 ** 20:8.1f} MB")
+        os.remove(path)
+
+# Benchmark: print-per-tree display vs batched rendering
+def benchmark_render(size=1_000_000):
+    import contextlib
+    rng = random.Random(42)
+    forest = Forest()
+    kinds = [("Oak", "Green", "Rough"), ("Pine", "Dark Green", "Smooth"), ("Birch", "White", "Papery")]
+    for _ in range(size):
+        forest.plant_tree(rng.uniform(0, 10_000), rng.uniform(0, 10_000), *rng.choice(kinds))
+
+    with open(os.devnull, "w") as devnull:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(devnull):
+            forest.display()
+        display_time = time.perf_counter() - start
+    with open(os.devnull, "wb") as devnull:
+        start = time.perf_counter()
+        forest.render(devnull)
+        ordered_time = time.perf_counter() - start
+        start = time.perf_counter()
+        forest.render(devnull, group_by_type=True)
+        grouped_time = time.perf_counter() - start
+    for label, elapsed in (("display()", display_time), ("render()", ordered_time),
+                           ("render(group_by_type)", grouped_time)):
+        print(f"{size:>11,} trees | {label:<22} {elapsed:8.2f} s, {size / elapsed:14,.0f} trees/sec")
+
+# Benchmark: row-by-row plant_tree vs load_stream with 1..8 workers
+def benchmark_load_stream(size=1_000_000, worker_counts=(1, 2, 4, 8), directory="."):
+    rng = random.Random(42)
+    kinds = [("Oak", "Green", "Rough"), ("Pine", "Dark Green", "Smooth"), ("Birch", "White", "Papery")]
+    path = os.path.join(directory, "forest.csv")
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(TREE_FIELDS)
+        for _ in range(size):
+            writer.writerow((rng.uniform(0, 10_000), rng.uniform(0, 10_000), *rng.choice(kinds)))
+
+    start = time.perf_counter()
+    forest = Forest()
+    with open(path, newline="") as file:
+        rows = csv.reader(file)
+        next(rows)
+        for x, y, name, color, texture in rows:
+            forest.plant_tree(float(x), float(y), name, color, texture)
+    baseline = time.perf_counter() - start
+    print(f"{size:>11,} rows | plant_tree loop    {baseline:8.2f} s, {size / baseline:12,.0f} rows/sec")
+    del forest
+
+    for workers in worker_counts:
+        start = time.perf_counter()
+        forest = Forest()
+        forest.load_stream(path, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert len(forest.trees) == size
+        print(f"{size:>11,} rows | load_stream({workers} cpu) {elapsed:8.2f} s, {size / elapsed:12,.0f} rows/sec,"
+              f" {baseline / elapsed:5.2f}x")
+        del forest
+    os.remove(path)
+
+def _cli_sizes(flag):
+    """Integer arguments following flag on the command line, e.g. --benchmark 1000000 10000000."""
+    sizes = []
+    for arg in sys.argv[sys.argv.index(flag) + 1:]:
+        if not arg.isdigit():
+            break
+        sizes.append(int(arg))
+    return sizes
+
 # Usage Example
 if __name__ == "__main__":
     forest = Forest()
@@ -105,3 +604,51 @@ if __name__ == "__main__":
     forest.plant_tree(3, 4, "Oak", "Green", "Rough")  # Reuses the same Oak type
 
     forest.display()
+
+    # Spatial queries with an incrementally maintained grid index
+    indexed_forest = Forest(GridIndex(cell_size=2))
+    indexed_forest.plant_tree(1, 1, "Oak", "Green", "Rough")
+    indexed_forest.plant_tree(2, 3, "Oak", "Green", "Rough")
+    indexed_forest.plant_tree(5, 2, "Pine", "Dark Green", "Smooth")
+    indexed_forest.plant_tree(3, 4, "Oak", "Green", "Rough")
+
+    print("\nTrees in viewport (0, 0) - (3, 3):")
+    for tree in indexed_forest.trees_in_region(0, 0, 3, 3):
+        tree.display()
+    print("\nTwo trees nearest to (5, 3):")
+    for tree in indexed_forest.nearest_trees(5, 3, n=2):
+        tree.display()
+
+    # Save to a compact binary file and reopen it memory-mapped
+    indexed_forest.save("forest.bin")
+    reopened = Forest.open("forest.bin")
+    print(f"\nReopened forest with {len(reopened.trees)} trees:")
+    reopened.display()
+    reopened.trees.close()
+    os.remove("forest.bin")
+
+    # Batched rendering produces the same text as display()
+    print("\nRendered in one buffered write:")
+    forest.render()
+
+    # Bulk planting from streamed rows (CSV here, JSONL works the same way)
+    streamed_forest = Forest()
+    streamed_forest.load_stream(["x,y,name,color,texture", "7,7,Oak,Green,Rough", "8,1,Birch,White,Papery"])
+    print(f"\nStreamed {len(streamed_forest.trees)} trees:")
+    streamed_forest.display()
+
+    # python 4_1_flyweight_pattern.py --benchmark [size ...]
+    if "--benchmark" in sys.argv:
+        benchmark_spatial_index(_cli_sizes("--benchmark") or (1_000_000, 10_000_000))
+
+    # python 4_1_flyweight_pattern.py --benchmark-persistence [size]
+    if "--benchmark-persistence" in sys.argv:
+        benchmark_persistence(*_cli_sizes("--benchmark-persistence")[:1])
+
+    # python 4_1_flyweight_pattern.py --benchmark-render [size]
+    if "--benchmark-render" in sys.argv:
+        benchmark_render(*_cli_sizes("--benchmark-render")[:1])
+
+    # python 4_1_flyweight_pattern.py --benchmark-load [size]
+    if "--benchmark-load" in sys.argv:
+        benchmark_load_stream(*_cli_sizes("--benchmark-load")[:1])
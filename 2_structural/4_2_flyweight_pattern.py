@@ -17,61 +17,1173 @@ Key Benefits:
 Explanation:
     1. Flyweight (DatabaseConnection)
         Represents a shared database connection.
-        Simulates executing a query.
+        Simulates executing a query; execute_many and pipeline() send a whole batch in one round trip.
+        SQLiteConnection is a real implementation on top of the standard library sqlite3 module.
+        Keeps an LRU cache of prepared statements (StatementCache) that survives pool checkouts.
     2. Flyweight Factory (DatabaseConnectionPool)
         Maintains a pool of reusable database connections.
-        Limits the number of active connections.
+        Limits the number of active connections, counting both idle and checked-out ones.
         Reuses existing connections whenever possible.
+        Blocks callers (first come, first served) when all connections are busy, with an optional timeout.
+        Optionally pre-warms min connections, evicts idle or old ones in a background reaper and
+        validates connections before handing them out.
+        Records wait / checkout time histograms, gauges and timeouts (pool.stats()) and can report
+        connections held too long together with the stack that checked them out.
+        Pools in several processes can share one GlobalConnectionBudget, so together they never open
+        more connections than the database allows; each shard borrows permits only while it needs them.
     3. Client (client_simulation())
         Requests a database connection.
         Executes a query.
         Releases the connection back into the pool.
+    4. Async Flyweight Factory (AsyncConnectionPool)
+        Same pooling for asyncio code: waiting and connecting never block the event loop, waiters are served in order,
+        and a cancelled or timed-out waiter never keeps a connection.
 """
 
-import time
+import asyncio
+import atexit
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager, redirect_stdout
+import itertools
+import multiprocessing
+import os
 import random
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection became available within the requested timeout."""
+
+class PoolClosedError(Exception):
+    """Raised to callers of get_connection on (or waiting in) a closed pool."""
+
+# Prepared statement cache: one per connection, keyed by SQL text
+class StatementCache:
+    """LRU cache of prepared statements with hit / miss / eviction counters."""
+    SCHEMA_CHANGES = ("CREATE", "ALTER", "DROP")
+
+    def __init__(self, capacity=128):
+        self.capacity = capacity
+        self._statements: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, sql, prepare):
+        """Return the prepared statement for sql, calling prepare(sql) on a miss."""
+        statement = self._statements.get(sql)
+        if statement is not None:
+            self.hits += 1
+            self._statements.move_to_end(sql)
+            return statement
+        self.misses += 1
+        statement = prepare(sql)
+        if self.capacity > 0:
+            self._statements[sql] = statement
+            if len(self._statements) > self.capacity:
+                self._statements.popitem(last=False)
+                self.evictions += 1
+        return statement
+
+    def invalidate_on_schema_change(self, sql):
+        """
+        Drop every cached statement after DDL, since their plans may no longer be valid.
+        Only DDL run through this connection is seen: a schema change made by another connection
+        leaves this cache as it is.
+        """
+        if sql.lstrip()[:6].upper().startswith(self.SCHEMA_CHANGES):
+            self._statements.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"size": len(self._statements), "capacity": self.capacity, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0}
 
 # Flyweight (Shared Database Connection)
 class DatabaseConnection:
-    def __init__(self, connection_id):
+    def __init__(self, connection_id, query_time=1, connect_time=0, parse_time=0, statement_cache_size=128):
         self.connection_id = connection_id
+        self.query_time = query_time
+        self.parse_time = parse_time
+        self.statements = StatementCache(statement_cache_size)  # Lives as long as the connection
         print(f"Creating Database Connection {self.connection_id}")
+        time.sleep(connect_time)  # Simulating connection setup (handshake, auth)
 
-    def execute_query(self, query):
-        print(f"Executing query on Connection {self.connection_id}: {query}")
-        time.sleep(1)  # Simulating query execution time
+    def _prepare(self, query):
+        if self.parse_time:
+            time.sleep(self.parse_time)  # Simulating server-side parse / plan
+        return query
+
+    def execute_query(self, query, params=()):
+        self.statements.get(query, self._prepare)
+        print(f"Executing query on Connection {self.connection_id}: {query} {params or ''}".rstrip())
+        time.sleep(self.query_time)  # Simulating query execution time
+        self.statements.invalidate_on_schema_change(query)
+
+    def execute_many(self, query, params_iter):
+        """Run one statement for every parameter tuple in a single round trip."""
+        self.statements.get(query, self._prepare)
+        params_list = list(params_iter)
+        print(f"Executing {len(params_list)} x query on Connection {self.connection_id}: {query}")
+        time.sleep(self.query_time)  # One round trip for the whole batch
+
+    def _execute_batch(self, statements):
+        """Run [(query, params), ...] in one round trip; returns one result per statement."""
+        print(f"Executing pipeline of {len(statements)} statements on Connection {self.connection_id}")
+        time.sleep(self.query_time)
+        return [None] * len(statements)
+
+    def pipeline(self, depth=100):
+        """with connection.pipeline() as pipe: queue statements, sent depth at a time."""
+        return Pipeline(self, depth)
+
+    def close(self):
+        print(f"Closing Database Connection {self.connection_id}")
+
+class Pipeline:
+    """
+    Queues statements and sends them depth at a time instead of waiting for each result.
+    Results are collected in order in pipe.results; the remainder is flushed when the block exits.
+    """
+    def __init__(self, connection, depth=100):
+        self.connection = connection
+        self.depth = depth
+        self.results = []
+        self._pending = []
+
+    def execute(self, query, params=()):
+        self._pending.append((query, params))
+        if len(self._pending) >= self.depth:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self.results.extend(self.connection._execute_batch(self._pending))
+            self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self._pending = []  # Don't send half of a failed batch
+
+_sqlite_directory = None
+
+def _default_sqlite_database():
+    """Path of this process's temporary SQLiteConnection database, created on first use."""
+    global _sqlite_directory
+    if _sqlite_directory is None:
+        _sqlite_directory = tempfile.mkdtemp(prefix="flyweight_pool_")
+        atexit.register(shutil.rmtree, _sqlite_directory, ignore_errors=True)
+    return os.path.join(_sqlite_directory, "pool.db")
+
+class SQLiteConnection(DatabaseConnection):
+    """
+    Real connection backed by sqlite3 with bound parameters (no f-string interpolation).
+    The default database is one temporary file per process (deleted at exit) in WAL mode, so readers
+    don't block the writer; a connection waits up to timeout seconds for another one's write lock.
+    A shared-cache in-memory database would not do here: its table locks fail at once, without waiting.
+    Single statements autocommit; execute_many and pipeline batches run in one transaction.
+
+    sqlite3 keeps the compiled statements itself, in its own per-connection LRU keyed by SQL text;
+    it is sized to match self.statements, which mirrors it to provide hit-rate metrics.
+    Schema changes made through other connections are not seen by the mirror, but sqlite3 itself
+    notices them (the schema cookie) and re-prepares the affected statements, so results stay correct.
+    """
+    def __init__(self, connection_id, database=None, statement_cache_size=128, timeout=5.0):
+        super().__init__(connection_id, query_time=0, statement_cache_size=statement_cache_size)
+        database = database or _default_sqlite_database()
+        self._db = sqlite3.connect(database, timeout=timeout, uri=database.startswith("file:"),
+                                   isolation_level=None, check_same_thread=False,
+                                   cached_statements=statement_cache_size)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; commits skip the fsync
+
+    def _prepare(self, query):
+        return query  # sqlite3 compiles the statement itself
+
+    def execute_query(self, query, params=()):
+        self.statements.get(query, self._prepare)
+        rows = self._db.execute(query, params).fetchall()
+        self.statements.invalidate_on_schema_change(query)
+        return rows
+
+    def execute_many(self, query, params_iter):
+        self.statements.get(query, self._prepare)
+        with self._transaction():
+            self._db.executemany(query, params_iter)
+
+    def _execute_batch(self, statements):
+        with self._transaction():
+            return [self.execute_query(query, params) for query, params in statements]
+
+    @contextmanager
+    def _transaction(self):
+        self._db.execute("BEGIN IMMEDIATE")  # Take the write lock now, waiting up to timeout for it
+        try:
+            yield
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def close(self):
+        super().close()
+        self._db.close()
+
+class AsyncDatabaseConnection:
+    """
+    Stand-in for an asyncio database driver connection. It does not inherit from DatabaseConnection,
+    whose time.sleep calls would block the event loop; connecting and querying are awaited instead.
+    """
+    def __init__(self, connection_id, query_time=1, connect_time=0):
+        self.connection_id = connection_id
+        self.query_time = query_time
+        self.connect_time = connect_time
+        print(f"Creating Database Connection {self.connection_id}")
+
+    async def connect(self):
+        if self.connect_time:
+            await asyncio.sleep(self.connect_time)  # Simulating connection setup (handshake, auth)
+
+    async def execute_query(self, query, params=()):
+        print(f"Executing query on Connection {self.connection_id}: {query} {params or ''}".rstrip())
+        await asyncio.sleep(self.query_time)  # Simulating query execution time
+
+    async def execute_many(self, query, params_iter):
+        """Run one statement for every parameter tuple in a single round trip."""
+        params_list = list(params_iter)
+        print(f"Executing {len(params_list)} x query on Connection {self.connection_id}: {query}")
+        await asyncio.sleep(self.query_time)  # One round trip for the whole batch
+
+    def close(self):
+        print(f"Closing Database Connection {self.connection_id}")
+
+class LatencyHistogram:
+    """Log-bucketed histogram of durations in seconds (about 19% bucket width, 1 us to ~2 min)."""
+    BOUNDS = [1e-6 * 2 ** (i / 4) for i in range(109)]
+
+    def __init__(self):
+        self.counts = [0] * (len(self.BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect_left(self.BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """Upper bound of the bucket holding the q-th percentile (0 < q <= 100)."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return min(self.BOUNDS[index], self.max) if index < len(self.BOUNDS) else self.max
+        return self.max
+
+    def summary(self):
+        return {"count": self.count, "mean": self.total / self.count if self.count else 0.0,
+                "p50": self.percentile(50), "p95": self.percentile(95), "p99": self.percentile(99),
+                "max": self.max}
+
+# Global budget: one connection limit shared by the pools of every worker process
+class GlobalConnectionBudget:
+    """
+    Cross-process connection limit backed by a shared semaphore. Create it in the parent process and
+    pass it to the workers; each DatabaseConnectionPool takes a permit per connection it opens and
+    gives it back when the connection is closed (e.g. by idle eviction), so capacity moves between
+    shards as load shifts.
+    A process that dies (crash, kill -9) can't give its permits back, so permits are recorded per PID
+    (for up to max_processes processes at a time). reclaim() returns those of processes that no longer
+    exist; try_acquire() runs it itself, at most every reclaim_interval seconds, when no permit is free.
+    A PID reused by a new process before the reclaim is not detected.
+    """
+    def __init__(self, limit, context=None, max_processes=64, reclaim_interval=1.0):
+        context = context or multiprocessing.get_context()
+        self.limit = limit
+        self.reclaim_interval = reclaim_interval
+        self._permits = context.BoundedSemaphore(limit)
+        self._counts = context.Array("i", 2)  # [open connections, peak open connections]; its lock guards both
+        self._holders = context.Array("i", 2 * max_processes, lock=False)  # (pid, permits held) pairs
+        self._last_reclaim = time.monotonic()
+
+    def try_acquire(self):
+        if not self._permits.acquire(block=False):
+            if time.monotonic() - self._last_reclaim < self.reclaim_interval or not self.reclaim():
+                return False
+            if not self._permits.acquire(block=False):
+                return False
+        with self._counts.get_lock():
+            self._counts[0] += 1
+            self._counts[1] = max(self._counts[1], self._counts[0])
+            self._add_held(os.getpid(), 1)
+        return True
+
+    def release(self):
+        with self._counts.get_lock():
+            self._counts[0] -= 1
+            self._add_held(os.getpid(), -1)
+        self._permits.release()
+
+    def _add_held(self, pid, delta):
+        """Called with the counts lock held."""
+        holders, free = self._holders, None
+        for slot in range(0, len(holders), 2):
+            if holders[slot] == pid:
+                holders[slot + 1] += delta
+                if not holders[slot + 1]:
+                    holders[slot] = 0
+                return
+            if free is None and not holders[slot]:
+                free = slot
+        if free is None:
+            raise RuntimeError("More processes hold connection permits than max_processes")
+        holders[free], holders[free + 1] = pid, delta
+
+    def reclaim(self):
+        """Give back the permits of processes that exited without releasing them; returns how many."""
+        self._last_reclaim = time.monotonic()
+        reclaimed = 0
+        with self._counts.get_lock():
+            holders = self._holders
+            for slot in range(0, len(holders), 2):
+                pid = holders[slot]
+                if not pid:
+                    continue
+                try:
+                    os.kill(pid, 0)
+                    continue
+                except ProcessLookupError:
+                    pass
+                except PermissionError:  # Alive, but owned by another user
+                    continue
+                reclaimed += holders[slot + 1]
+                self._counts[0] -= holders[slot + 1]
+                holders[slot] = holders[slot + 1] = 0
+        for _ in range(reclaimed):
+            self._permits.release()
+        return reclaimed
+
+    @property
+    def in_use(self):
+        return self._counts[0]
+
+    @property
+    def peak(self):
+        return self._counts[1]
+
+# Handed to a waiter instead of a connection: a slot has been reserved for it, it opens the connection itself
+_OPEN_SLOT = object()
+
+class _Waiter:
+    """A thread blocked in get_connection; release hands a connection (or _OPEN_SLOT) straight to it."""
+    __slots__ = ("condition", "connection")
+
+    def __init__(self, lock):
+        self.condition = threading.Condition(lock)
+        self.connection = None
 
 # Flyweight Factory (Connection Pool Manager)
 class DatabaseConnectionPool:
-    _pool = []
-    _max_connections = 3  # Limit the number of connections
-
-    @staticmethod
-    def get_connection():
-        if DatabaseConnectionPool._pool:
-            print("Reusing existing connection...")
-            return DatabaseConnectionPool._pool.pop()
-        elif len(DatabaseConnectionPool._pool) < DatabaseConnectionPool._max_connections:
-            connection = DatabaseConnection(len(DatabaseConnectionPool._pool) + 1)
-            return connection
+    """
+    Thread-safe pool holding between min_connections and max_connections connections.
+    Callers block until a connection is free; waiters are served strictly in arrival order
+    because a released connection is handed directly to the oldest waiter.
+    The lock only guards bookkeeping: opening (connect_time), validating and closing connections happen
+    outside it, in slots reserved under it, so one slow connect or ping never stalls other borrowers.
+    close() wakes every waiter with PoolClosedError.
+
+    Maintenance (all optional):
+        min_connections: opened up front and kept open by the reaper.
+        idle_timeout: idle connections above min_connections are closed after this many seconds.
+        max_lifetime: connections older than this are closed on release or by the reaper.
+        validate: validate(connection) -> bool, checked before an idle connection is handed out.
+
+    Instrumentation:
+        stats(): wait and checkout time histograms, in-use / idle gauges and timeout count.
+        leak_threshold: connections held longer than this many seconds are reported by leaks(),
+            with the stack that checked them out (captured only when this is set).
+        on_stats: on_stats(stats) is called by the reaper every reaper_interval, e.g. to export metrics.
+
+    Multi-process:
+        budget: a GlobalConnectionBudget shared with other processes' pools; every open connection
+            holds one of its permits. Waiters poll for a free permit every budget_poll_interval seconds,
+            and new callers don't take a permit while anyone is queued, so waiters stay first in line.
+    """
+    def __init__(self, max_connections=3, timeout=None, connection_factory=DatabaseConnection,
+                 min_connections=0, idle_timeout=None, max_lifetime=None, validate=None, reaper_interval=1.0,
+                 leak_threshold=None, on_stats=None, budget=None, budget_poll_interval=0.01):
+        if not 0 <= min_connections <= max_connections:
+            raise ValueError("Expected 0 <= min_connections <= max_connections")
+        self._max_connections = max_connections  # Limit the number of connections
+        self._min_connections = min_connections
+        self._timeout = timeout  # Default seconds to wait in get_connection; None waits forever
+        self._connection_factory = connection_factory
+        self._idle_timeout = idle_timeout
+        self._max_lifetime = max_lifetime
+        self._validate = validate
+        self._budget = budget
+        self._budget_poll_interval = budget_poll_interval
+        self._lock = threading.Lock()
+        self._idle: list[tuple] = []  # (connection, idle since); most recently released last
+        self._in_use: set = set()
+        self._opened_at: dict = {}
+        self._waiters: deque[_Waiter] = deque()
+        self._opening = 0  # Slots reserved by _reserve() whose connection is being opened
+        self._ids = itertools.count(1)
+        self._closed = threading.Event()
+        self._leak_threshold = leak_threshold
+        self._on_stats = on_stats
+        self._wait_times = LatencyHistogram()
+        self._checkout_times = LatencyHistogram()
+        self._checkouts: dict = {}  # connection -> (checked out at, stack or None)
+        self._reported_leaks: set = set()
+        self._timeouts = 0
+
+        self._top_up()  # Pre-warm so the first clients don't pay for connection setup
+        self._reaper = None
+        if any(option is not None for option in (idle_timeout, max_lifetime, leak_threshold, on_stats)):
+            self._reaper = threading.Thread(target=self._reap_forever, args=(reaper_interval,), daemon=True)
+            self._reaper.start()
+
+    @property
+    def total_connections(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    @property
+    def checked_out(self):
+        return len(self._in_use)
+
+    def get_connection(self, timeout=None):
+        timeout = self._timeout if timeout is None else timeout
+        requested_at = time.monotonic()
+        deadline = None if timeout is None else requested_at + timeout
+        while True:
+            with self._lock:
+                if self._closed.is_set():
+                    raise PoolClosedError("The connection pool is closed")
+                connection = None if self._waiters else self._take_idle()
+                if connection is not None:
+                    print("Reusing existing connection...")
+                elif not self._waiters and self._reserve():  # Queued budget pollers go first
+                    connection = _OPEN_SLOT
+                else:
+                    print("No available connections! Please wait...")
+                    connection = self._wait(timeout, deadline)
+                if connection is not _OPEN_SLOT:
+                    self._in_use.add(connection)  # Ours while it is being validated
+            if connection is _OPEN_SLOT:
+                connection = self._open()
+                with self._lock:
+                    self._opening -= 1
+                    self._opened_at[connection] = time.monotonic()
+                    self._in_use.add(connection)
+                break  # Just opened: no need to validate it
+            if self._is_usable(connection):
+                break
+            print(f"Discarding stale Connection {connection.connection_id}")
+            with self._lock:
+                self._in_use.discard(connection)
+                self._forget(connection)
+            self._close(connection)
+            if deadline is not None and time.monotonic() >= deadline:
+                with self._lock:
+                    self._timeouts += 1
+                raise PoolTimeoutError(f"No usable database connection within {timeout}s")
+        stack = traceback.format_stack()[:-1] if self._leak_threshold is not None else None  # Slow: not under the lock
+        with self._lock:
+            now = time.monotonic()
+            self._wait_times.record(now - requested_at)
+            self._checkouts[connection] = (now, stack)
+        return connection
+
+    def _reserve(self):
+        """
+        Claim room for one more connection, locally and in the global budget if there is one.
+        Called under the lock; the caller then opens the connection outside it.
+        """
+        if self.total_connections >= self._max_connections:
+            return False
+        if self._budget is not None and not self._budget.try_acquire():
+            return False
+        self._opening += 1
+        return True
+
+    def _open(self):
+        """Open a connection for a reserved slot; called without the lock."""
+        try:
+            return self._connection_factory(next(self._ids))
+        except BaseException:
+            with self._lock:
+                self._unreserve()
+            raise
+
+    def _unreserve(self):
+        """Give back a reserved slot that will not be opened; called under the lock."""
+        self._opening -= 1
+        if self._budget is not None:
+            self._budget.release()
+        self._hand_slot()
+
+    def _forget(self, connection):
+        """Stop counting a connection the caller is about to close; called under the lock."""
+        del self._opened_at[connection]
+        if self._budget is not None:
+            self._budget.release()
+        self._hand_slot()
+
+    def _hand_slot(self):
+        """Capacity was freed: let the oldest waiter open a connection of its own."""
+        if self._waiters and not self._closed.is_set() and self._reserve():
+            waiter = self._waiters.popleft()
+            waiter.connection = _OPEN_SLOT
+            waiter.condition.notify()
+
+    def _close(self, connection):
+        """Close a forgotten connection; called without the lock."""
+        try:
+            connection.close()
+        except Exception as error:
+            print(f"Ignoring error while closing Connection {connection.connection_id}: {error}")
+
+    def _is_usable(self, connection):
+        """Called without the lock, since validate may be a round trip to the database."""
+        if self._max_lifetime is not None and time.monotonic() - self._opened_at[connection] > self._max_lifetime:
+            return False
+        if self._validate is None:
+            return True
+        try:
+            return bool(self._validate(connection))
+        except Exception:
+            return False
+
+    def _take_idle(self):
+        return self._idle.pop()[0] if self._idle else None
+
+    def _top_up(self):
+        """Open connections (outside the lock) until min_connections are open."""
+        with self._lock:
+            slots = 0
+            while not self._closed.is_set() and self.total_connections < self._min_connections and self._reserve():
+                slots += 1
+        for opened in range(slots):
+            try:
+                connection = self._open()  # Gives back its own slot if it fails
+            except BaseException:
+                with self._lock:
+                    for _ in range(slots - opened - 1):
+                        self._unreserve()
+                raise
+            with self._lock:
+                self._opening -= 1
+                self._opened_at[connection] = time.monotonic()
+                if self._waiters:
+                    waiter = self._waiters.popleft()
+                    self._in_use.add(connection)
+                    waiter.connection = connection
+                    waiter.condition.notify()
+                else:
+                    self._idle.append((connection, time.monotonic()))
+
+    def _wait(self, timeout, deadline):
+        waiter = _Waiter(self._lock)
+        self._waiters.append(waiter)
+        while waiter.connection is None:
+            if self._closed.is_set():
+                self._waiters.remove(waiter)
+                raise PoolClosedError("The connection pool was closed while waiting")
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                self._waiters.remove(waiter)
+                self._timeouts += 1
+                raise PoolTimeoutError(
+                    f"No database connection available within {timeout}s "
+                    f"({self._max_connections} connections, all checked out)")
+            if self._budget is None:
+                waiter.condition.wait(remaining)
+                continue
+            # Another process may free a permit without notifying us, so poll for it
+            if self._waiters[0] is waiter and self._reserve():
+                self._waiters.popleft()
+                return _OPEN_SLOT
+            poll = self._budget_poll_interval
+            waiter.condition.wait(poll if remaining is None else min(remaining, poll))
+        return waiter.connection
+
+    def release_connection(self, connection):
+        with self._lock:
+            if connection not in self._in_use:
+                raise ValueError(f"Connection {connection.connection_id} is not checked out from this pool")
+            print(f"Releasing Connection {connection.connection_id} back to pool.")
+            checked_out_at, _ = self._checkouts.pop(connection)
+            self._checkout_times.record(time.monotonic() - checked_out_at)
+            self._reported_leaks.discard(connection)
+            if self._waiters:
+                # Hand off directly; the connection stays counted as checked out
+                waiter = self._waiters.popleft()
+                waiter.connection = connection
+                waiter.condition.notify()
+                return
+            self._in_use.remove(connection)
+            if not self._closed.is_set() and (self._max_lifetime is None or
+                                              time.monotonic() - self._opened_at[connection] <= self._max_lifetime):
+                self._idle.append((connection, time.monotonic()))
+                return
+            self._forget(connection)
+        self._close(connection)
+        self._top_up()
+
+    def reap(self):
+        """Close idle connections past idle_timeout or max_lifetime, then top back up to min_connections."""
+        closing = []
+        with self._lock:
+            now = time.monotonic()
+            keep = []
+            surplus = self.total_connections - self._min_connections
+            for connection, idle_since in self._idle:  # Oldest first
+                expired = self._max_lifetime is not None and now - self._opened_at[connection] > self._max_lifetime
+                idle_too_long = self._idle_timeout is not None and now - idle_since > self._idle_timeout
+                if expired or (idle_too_long and surplus > 0):
+                    closing.append(connection)
+                    surplus -= 1
+                else:
+                    keep.append((connection, idle_since))
+            self._idle = keep
+            for connection in closing:
+                self._forget(connection)
+        for connection in closing:
+            self._close(connection)
+        self._top_up()
+
+    def _reap_forever(self, interval):
+        while not self._closed.wait(interval):
+            try:
+                self.reap()
+                if self._leak_threshold is not None:
+                    for leak in self.leaks():
+                        if leak["connection"] not in self._reported_leaks:
+                            self._reported_leaks.add(leak["connection"])
+                            print(f"Possible leak: Connection {leak['connection_id']} held for "
+                                  f"{leak['held_for']:.1f}s, checked out at:\n{''.join(leak['stack'])}")
+                if self._on_stats is not None:
+                    self._on_stats(self.stats())
+            except Exception as error:  # e.g. the database is briefly down: try again next round
+                print(f"Connection pool maintenance failed: {error!r}")
+
+    def stats(self):
+        """Snapshot of pool metrics; durations are in seconds."""
+        with self._lock:
+            return {"max_connections": self._max_connections, "total": self.total_connections,
+                    "in_use": len(self._in_use), "idle": len(self._idle), "waiting": len(self._waiters),
+                    "timeouts": self._timeouts, "wait_time": self._wait_times.summary(),
+                    "checkout_time": self._checkout_times.summary()}
+
+    def leaks(self):
+        """Connections checked out for longer than leak_threshold, longest first."""
+        if self._leak_threshold is None:
+            return []
+        now = time.monotonic()
+        with self._lock:
+            held = [{"connection": connection, "connection_id": connection.connection_id,
+                     "held_for": now - checked_out_at, "stack": stack}
+                    for connection, (checked_out_at, stack) in self._checkouts.items()
+                    if now - checked_out_at > self._leak_threshold]
+        return sorted(held, key=lambda leak: leak["held_for"], reverse=True)
+
+    def close(self):
+        """
+        Stop the reaper, close idle connections and fail every waiter with PoolClosedError;
+        checked-out connections are closed on release.
+        """
+        with self._lock:
+            self._closed.set()
+            closing = [connection for connection, _ in self._idle]
+            self._idle.clear()
+            for connection in closing:
+                self._forget(connection)
+            for waiter in self._waiters:
+                waiter.condition.notify()
+        for connection in closing:
+            self._close(connection)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        """Check out a connection for the duration of a with block."""
+        connection = self.get_connection(timeout)
+        try:
+            yield connection
+        finally:
+            self.release_connection(connection)
+
+# Async Flyweight Factory (Connection Pool Manager for asyncio)
+class AsyncConnectionPool:
+    """
+    asyncio counterpart of DatabaseConnectionPool. Each waiter is a future in a FIFO queue and
+    release resolves the oldest live one. New connections are opened with await connection.connect(),
+    in a slot counted while it connects. Must be used from a single event loop.
+    """
+    def __init__(self, max_connections=3, timeout=None, connection_factory=AsyncDatabaseConnection):
+        self._max_connections = max_connections
+        self._timeout = timeout  # Default seconds to wait in get_connection; None waits forever
+        self._connection_factory = connection_factory
+        self._idle: list = []
+        self._in_use: set = set()
+        self._waiters: deque[asyncio.Future] = deque()
+        self._opening = 0  # Slots whose connection is being opened
+        self._ids = itertools.count(1)
+
+    @property
+    def total_connections(self):
+        return len(self._idle) + len(self._in_use) + self._opening
+
+    @property
+    def checked_out(self):
+        return len(self._in_use)
+
+    async def get_connection(self, timeout=None):
+        timeout = self._timeout if timeout is None else timeout
+        if self._idle and not self._waiters:
+            connection = self._idle.pop()
+        elif self.total_connections < self._max_connections:
+            self._opening += 1
+            return await self._open()
         else:
-            print("No available connections! Please wait...")
-            time.sleep(2)  # Simulating wait time for an available connection
-            return DatabaseConnectionPool.get_connection()  # Retry
+            connection = await self._wait(timeout)
+            return await self._open() if connection is _OPEN_SLOT else connection
+        self._in_use.add(connection)
+        return connection
+
+    async def _open(self):
+        """Open a connection for a slot already counted in _opening."""
+        connection = None
+        try:
+            connection = self._connection_factory(next(self._ids))
+            await connection.connect()
+        except BaseException:
+            if connection is not None:
+                connection.close()
+            self._opening -= 1
+            self._hand_slot()
+            raise
+        self._opening -= 1
+        self._in_use.add(connection)
+        return connection
+
+    def _hand_slot(self):
+        """A slot was freed without a connection to pass on: let the oldest waiter open one."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self._opening += 1
+                waiter.set_result(_OPEN_SLOT)
+                return
+
+    async def _wait(self, timeout):
+        loop = asyncio.get_running_loop()
+        waiter = loop.create_future()
+        self._waiters.append(waiter)
+        expiry = None if timeout is None else loop.call_later(timeout, self._expire, waiter, timeout)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            # The connection may have been handed over just before the cancellation landed
+            if waiter.done() and not waiter.cancelled() and waiter.exception() is None:
+                if waiter.result() is _OPEN_SLOT:
+                    self._opening -= 1
+                    self._hand_slot()
+                else:
+                    self.release_connection(waiter.result())
+            raise
+        finally:
+            if expiry is not None:
+                expiry.cancel()
 
-    @staticmethod
-    def release_connection(connection):
-        print(f"Releasing Connection {connection.connection_id} back to pool.")
-        DatabaseConnectionPool._pool.append(connection)
+    def _expire(self, waiter, timeout):
+        if not waiter.done():
+            self._waiters.remove(waiter)
+            waiter.set_exception(PoolTimeoutError(
+                f"No database connection available within {timeout}s "
+                f"({self._max_connections} connections, all checked out)"))
+
+    def release_connection(self, connection):
+        if connection not in self._in_use:
+            raise ValueError(f"Connection {connection.connection_id} is not checked out from this pool")
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():  # Skip waiters that were cancelled while queued
+                waiter.set_result(connection)  # Stays counted as checked out
+                return
+        self._in_use.remove(connection)
+        self._idle.append(connection)
+
+    @asynccontextmanager
+    async def acquire(self, timeout=None):
+        """async with pool.acquire() as connection: ..."""
+        connection = await self.get_connection(timeout)
+        try:
+            yield connection
+        finally:
+            self.release_connection(connection)
+
+pool = DatabaseConnectionPool()
 
 # Client: Application making database queries
 def client_simulation(client_id):
     print(f"\nClient {client_id} requesting database connection...")
-    connection = DatabaseConnectionPool.get_connection()
-    connection.execute_query(f"SELECT * FROM users WHERE id = {random.randint(1, 100)}")
-    DatabaseConnectionPool.release_connection(connection)
+    with pool.connection() as connection:
+        connection.execute_query("SELECT * FROM users WHERE id = ?", (random.randint(1, 100),))
+
+# Load test: many threads contending for a small pool
+def load_test(threads=200, max_connections=10, query_time=0.01):
+    test_pool = DatabaseConnectionPool(max_connections,
+                                       connection_factory=lambda cid: DatabaseConnection(cid, query_time))
+    peak = 0
+    peak_lock = threading.Lock()
+    waits = []
+
+    def worker(client_id):
+        nonlocal peak
+        start = time.perf_counter()
+        with test_pool.connection() as connection:
+            waited = time.perf_counter() - start
+            with peak_lock:
+                peak = max(peak, test_pool.checked_out)
+                waits.append(waited)
+            connection.execute_query(f"SELECT * FROM users WHERE id = {client_id}")
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        # A pool with one busy connection must time out instead of waiting forever
+        tiny_pool = DatabaseConnectionPool(1, connection_factory=lambda cid: DatabaseConnection(cid, 0))
+        held = tiny_pool.get_connection()
+        try:
+            tiny_pool.get_connection(timeout=0.05)
+            timed_out = False
+        except PoolTimeoutError:
+            timed_out = True
+        tiny_pool.release_connection(held)
+
+    assert len(waits) == threads, "every client got a connection"
+    assert peak <= max_connections and test_pool.total_connections <= max_connections
+    assert test_pool.checked_out == 0 and timed_out
+    assert tiny_pool.stats()["timeouts"] == 1
+    stats = test_pool.stats()
+    wait, checkout = stats["wait_time"], stats["checkout_time"]
+    print(f"{threads} threads / {max_connections} connections: {elapsed:.2f} s total, "
+          f"peak checked out {peak}, created {stats['total']}")
+    print(f"  wait p50 {wait['p50'] * 1e3:.1f} ms, p95 {wait['p95'] * 1e3:.1f} ms, p99 {wait['p99'] * 1e3:.1f} ms, "
+          f"max {wait['max'] * 1e3:.1f} ms; checkout p50 {checkout['p50'] * 1e3:.1f} ms")
+
+# Maintenance test: flaky connections, idle eviction, lifetime recycling and pre-warming
+class FlakyConnection(DatabaseConnection):
+    """Fake connection that randomly dies; once dead it stays dead."""
+    failure_rate = 0.2
+
+    def __init__(self, connection_id):
+        super().__init__(connection_id, query_time=0.001)
+        self.alive = True
+
+    def ping(self):
+        if random.random() < self.failure_rate:
+            self.alive = False
+        return self.alive
+
+    def execute_query(self, query):
+        if not self.alive:
+            raise RuntimeError(f"Connection {self.connection_id} is dead")
+        super().execute_query(query)
+
+def maintenance_test(threads=20, queries_per_thread=50):
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        # Validate-on-borrow: no dead connection is ever handed out
+        flaky_pool = DatabaseConnectionPool(5, connection_factory=FlakyConnection, min_connections=2,
+                                            validate=FlakyConnection.ping)
+        failures = []
+
+        def worker():
+            for _ in range(queries_per_thread):
+                with flaky_pool.connection() as connection:
+                    try:
+                        connection.execute_query("SELECT 1")
+                    except RuntimeError as error:
+                        failures.append(error)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        opened = next(flaky_pool._ids) - 1
+
+        # Idle eviction shrinks back to min_connections; max_lifetime recycles old connections
+        quick = lambda cid: DatabaseConnection(cid, query_time=0)
+        idle_pool = DatabaseConnectionPool(4, connection_factory=quick, min_connections=1,
+                                           idle_timeout=0.05, max_lifetime=0.3, reaper_interval=0.02)
+        held = [idle_pool.get_connection() for _ in range(4)]
+        first_ids = {connection.connection_id for connection in held}
+        for connection in held:
+            idle_pool.release_connection(connection)
+        time.sleep(0.15)
+        after_idle = idle_pool.total_connections
+        time.sleep(0.4)
+        survivor = idle_pool.get_connection()
+        idle_pool.release_connection(survivor)
+        idle_pool.close()
+
+        # Pre-warming: first-request latency with a 50 ms connection setup
+        slow = lambda cid: DatabaseConnection(cid, query_time=0, connect_time=0.05)
+        latencies = {}
+        for min_connections in (0, 3):
+            warm_pool = DatabaseConnectionPool(3, connection_factory=slow, min_connections=min_connections)
+            start = time.perf_counter()
+            with warm_pool.connection() as connection:
+                connection.execute_query("SELECT 1")
+            latencies[min_connections] = time.perf_counter() - start
+
+    assert not failures, failures
+    assert flaky_pool.total_connections <= 5
+    assert after_idle == 1
+    assert survivor.connection_id not in first_ids
+    print(f"Flaky pool: {threads * queries_per_thread} queries, no dead connection handed out, "
+          f"{opened} connections opened in total")
+    print(f"Idle eviction: 4 -> {after_idle} connections; lifetime recycling replaced connection "
+          f"{sorted(first_ids)} with {survivor.connection_id}")
+    print(f"First request latency: cold {latencies[0] * 1e3:.1f} ms, pre-warmed {latencies[3] * 1e3:.1f} ms")
+
+def leak_detection_demo():
+    exported = []
+    leaky_pool = DatabaseConnectionPool(2, connection_factory=lambda cid: DatabaseConnection(cid, query_time=0),
+                                        leak_threshold=0.05, reaper_interval=0.02, on_stats=exported.append)
+    forgotten = leaky_pool.get_connection()  # Never released
+    time.sleep(0.1)
+    leaks = leaky_pool.leaks()
+    assert leaks and leaks[0]["connection_id"] == forgotten.connection_id and exported
+    print(f"Exported {len(exported)} stats snapshots, latest: in_use={exported[-1]['in_use']} "
+          f"idle={exported[-1]['idle']}")
+    leaky_pool.release_connection(forgotten)
+    leaky_pool.close()
+
+# Benchmark: 10k concurrent coroutines sharing a small async pool
+async def async_benchmark(coroutines=10_000, max_connections=50, query_time=0.001):
+    async_pool = AsyncConnectionPool(max_connections,
+                                     connection_factory=lambda cid: AsyncDatabaseConnection(cid, query_time))
+    waits = []
+
+    async def client(client_id):
+        start = time.perf_counter()
+        async with async_pool.acquire() as connection:
+            waits.append(time.perf_counter() - start)
+            await connection.execute_query(f"SELECT * FROM users WHERE id = {client_id}")
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        start = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(coroutines)))
+        elapsed = time.perf_counter() - start
+
+        # Cancel half of a crowd of waiters and let the rest time out: nothing may leak
+        crowd = [asyncio.create_task(async_pool.get_connection(timeout=0.05)) for _ in range(1_000)]
+        await asyncio.sleep(0)
+        for task in crowd[::2]:
+            task.cancel()
+        results = await asyncio.gather(*crowd, return_exceptions=True)
+        for result in results:
+            if isinstance(result, AsyncDatabaseConnection):
+                async_pool.release_connection(result)
+
+    assert len(waits) == coroutines
+    assert async_pool.checked_out == 0 and async_pool.total_connections <= max_connections
+    assert not any(not waiter.done() for waiter in async_pool._waiters)
+    waits.sort()
+    print(f"{coroutines} coroutines / {max_connections} connections: {elapsed:.2f} s total, "
+          f"{coroutines / elapsed:,.0f} acquires/sec, wait p50 {waits[len(waits) // 2] * 1e3:.1f} ms, "
+          f"p99 {waits[int(len(waits) * 0.99)] * 1e3:.1f} ms")
+
+# Benchmark: 100k inserts one by one vs execute_many vs pipeline on a real sqlite connection
+def batch_benchmark(rows=100_000, depth=1_000):
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        connection = SQLiteConnection(1)
+    connection.execute_query("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, name TEXT)")
+    params = [(i, f"user{i}") for i in range(rows)]
+    timings = {}
+
+    def run(label, insert):
+        connection.execute_query("DELETE FROM users")
+        start = time.perf_counter()
+        insert()
+        timings[label] = time.perf_counter() - start
+        assert connection.execute_query("SELECT COUNT(*) FROM users") == [(rows,)]
+
+    def single():
+        for row in params:
+            connection.execute_query("INSERT INTO users (id, name) VALUES (?, ?)", row)
+
+    def pipelined():
+        with connection.pipeline(depth) as pipe:
+            for row in params:
+                pipe.execute("INSERT INTO users (id, name) VALUES (?, ?)", row)
+
+    run("single", single)
+    run("execute_many", lambda: connection.execute_many("INSERT INTO users (id, name) VALUES (?, ?)", params))
+    run(f"pipeline({depth})", pipelined)
+    for label, elapsed in timings.items():
+        print(f"{rows:,} inserts | {label:<15} {elapsed:7.3f} s, {rows / elapsed:12,.0f} rows/sec, "
+              f"{timings['single'] / elapsed:5.1f}x")
+
+    # Pipelining pays off where each statement costs a network round trip (simulated 1 ms here)
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        connection.close()
+        remote = DatabaseConnection(2, query_time=0.001)
+        start = time.perf_counter()
+        for row in params[:1_000]:
+            remote.execute_query("INSERT INTO users (id, name) VALUES (?, ?)", row)
+        single_remote = time.perf_counter() - start
+        start = time.perf_counter()
+        with remote.pipeline(100) as pipe:
+            for row in params[:1_000]:
+                pipe.execute("INSERT INTO users (id, name) VALUES (?, ?)", row)
+        pipelined_remote = time.perf_counter() - start
+    print(f"1,000 inserts over a 1 ms link | single {single_remote:.3f} s, pipeline(100) {pipelined_remote:.3f} s")
+
+# Benchmark: repeated parameterized SELECT with and without the prepared statement cache
+def statement_cache_benchmark(queries=50_000, rows=1_000):
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        keeper = SQLiteConnection(0)  # Sets up the table both connections read
+        uncached, cached = SQLiteConnection(1, statement_cache_size=0), SQLiteConnection(2)
+    keeper.execute_query("CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, name TEXT)")
+    keeper.execute_query("DELETE FROM users")
+    keeper.execute_many("INSERT INTO users (id, name) VALUES (?, ?)", ((i, f"user{i}") for i in range(rows)))
+    ids = [(random.randint(1, rows),) for _ in range(queries)]
+
+    timings = {}
+    for label, connection in (("no cache", uncached), ("LRU cache", cached)):
+        start = time.perf_counter()
+        for params in ids:
+            connection.execute_query("SELECT * FROM users WHERE id = ?", params)
+        timings[label] = time.perf_counter() - start
+        print(f"{queries:,} SELECTs | {label:<9} {timings[label]:6.3f} s, {queries / timings[label]:10,.0f} q/s,"
+              f" hit rate {connection.statements.stats()['hit_rate']:.1%}")
+    print(f"Speedup from caching: {timings['no cache'] / timings['LRU cache']:.2f}x")
+
+    # A schema change empties the cache; the next SELECT is prepared again
+    cached.execute_query("CREATE INDEX IF NOT EXISTS users_name ON users (name)")
+    cached.execute_query("SELECT * FROM users WHERE id = ?", (1,))
+    assert cached.statements.stats()["size"] == 1
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for connection in (uncached, cached, keeper):
+            connection.close()
+
+# Load test: several worker processes, each with its own pool, sharing one global budget
+def _shard_worker(shard_id, budget, database, threads, queries):
+    shard_pool = DatabaseConnectionPool(4, budget=budget, idle_timeout=0.02, reaper_interval=0.01,
+                                        connection_factory=lambda cid: SQLiteConnection(f"{shard_id}-{cid}", database))
+
+    def worker():
+        for _ in range(queries):
+            with shard_pool.connection() as connection:
+                connection.execute_query("SELECT * FROM users WHERE id = ?", (random.randint(1, 100),))
+                time.sleep(0.001)  # Hold the connection like a real request would
+
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        shard_pool.close()
+
+def _crashing_shard(budget, connections):
+    for _ in range(connections):
+        budget.try_acquire()
+    os._exit(1)  # No cleanup, like a crash
+
+def sharded_load_test(processes=4, limit=6, threads=8, queries=50):
+    budget = GlobalConnectionBudget(limit)
+    with tempfile.TemporaryDirectory() as directory:
+        database = os.path.join(directory, "users.db")
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            setup = SQLiteConnection(0, database)
+            setup.execute_query("CREATE TABLE users (id INTEGER PRIMARY KEY, name TEXT)")
+            setup.execute_many("INSERT INTO users (id, name) VALUES (?, ?)", ((i, f"user{i}") for i in range(1, 101)))
+            setup.close()
+
+        start = time.perf_counter()
+        workers = [multiprocessing.Process(target=_shard_worker, args=(shard, budget, database, threads, queries))
+                   for shard in range(processes)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+    assert all(process.exitcode == 0 for process in workers)
+    assert budget.peak <= limit and budget.in_use == 0
+
+    # A shard that dies holding connections: its permits come back once it is gone
+    crashed = multiprocessing.Process(target=_crashing_shard, args=(budget, 3))
+    crashed.start()
+    crashed.join()
+    assert budget.in_use == 3
+    reclaimed = budget.reclaim()
+    assert reclaimed == 3 and budget.in_use == 0 and all(budget.try_acquire() for _ in range(limit))
+    for _ in range(limit):
+        budget.release()
+    print(f"{processes} processes x 4 connections wanted, global limit {limit}: "
+          f"{processes * threads * queries:,} queries in {elapsed:.2f} s, peak open {budget.peak}; "
+          f"a crashed shard's {reclaimed} permits were reclaimed")
 
 # Simulate Multiple Clients Accessing Database
 if __name__ == "__main__":
     for i in range(5):  # Simulate 5 clients making queries
         client_simulation(i)
+
+    # python 4_2_flyweight_pattern.py --load-test
+    if "--load-test" in sys.argv:
+        load_test()
+
+    # python 4_2_flyweight_pattern.py --maintenance-test
+    if "--maintenance-test" in sys.argv:
+        maintenance_test()
+
+    # python 4_2_flyweight_pattern.py --leak-demo
+    if "--leak-demo" in sys.argv:
+        leak_detection_demo()
+
+    # python 4_2_flyweight_pattern.py --batch-benchmark
+    if "--batch-benchmark" in sys.argv:
+        batch_benchmark()
+
+    # python 4_2_flyweight_pattern.py --statement-cache-benchmark
+    if "--statement-cache-benchmark" in sys.argv:
+        statement_cache_benchmark()
+
+    # python 4_2_flyweight_pattern.py --sharded-load-test
+    if "--sharded-load-test" in sys.argv:
+        sharded_load_test()
+
+    # python 4_2_flyweight_pattern.py --async-benchmark
+    if "--async-benchmark" in sys.argv:
+        asyncio.run(async_benchmark())
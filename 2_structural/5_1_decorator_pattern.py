@@ -41,8 +41,19 @@ Explanation:
         Extend the functionality by modifying cost() and description().
     5. Client Code
         Starts with a SimpleCoffee and dynamically adds Milk, Sugar, and Vanilla decorators.
+    6. Flattening (freeze / FrozenCoffee)
+        Every cost()/description() call walks the whole chain, and very deep chains hit the recursion
+        limit. freeze() walks the chain once, iteratively, and returns a FrozenCoffee holding the summed
+        cost and the pre-joined description.
+    7. Bulk Pricing (register_addon / price_orders)
+        Add-ons registered with @register_addon get a one-byte code. price_orders() prices many orders,
+        given as code sequences, from the derived price table without building any decorator objects.
 """
 from abc import ABC, abstractmethod
+from operator import itemgetter
+import random
+import sys
+import time
 
 # Component Interface (Base Class)
 class Coffee(ABC):
@@ -73,27 +84,166 @@ class CoffeeDecorator(Coffee):
     def description(self):
         return self._coffee.description()
 
+# Add-on registry: code -> decorator class, used for bulk pricing
+ADDONS: list[type] = []
+
+def register_addon(decorator_cls):
+    """Class decorator giving an add-on (with price / label) the next order code."""
+    decorator_cls.code = len(ADDONS)
+    ADDONS.append(decorator_cls)
+    return decorator_cls
+
 # Concrete Decorators
+# price / label describe what each add-on contributes, so freeze() can flatten them without recursion
+@register_addon
 class MilkDecorator(CoffeeDecorator):
+    price = 2
+    label = "Milk"
+
     def cost(self):
-        return self._coffee.cost() + 2  # Adds cost for milk
+        return self._coffee.cost() + self.price  # Adds cost for milk
 
     def description(self):
-        return self._coffee.description() + ", Milk"
+        return self._coffee.description() + ", " + self.label
 
+@register_addon
 class SugarDecorator(CoffeeDecorator):
+    price = 1
+    label = "Sugar"
+
     def cost(self):
-        return self._coffee.cost() + 1  # Adds cost for sugar
+        return self._coffee.cost() + self.price  # Adds cost for sugar
 
     def description(self):
-        return self._coffee.description() + ", Sugar"
+        return self._coffee.description() + ", " + self.label
 
+@register_addon
 class VanillaDecorator(CoffeeDecorator):
+    price = 3
+    label = "Vanilla"
+
     def cost(self):
-        return self._coffee.cost() + 3  # Adds cost for vanilla
+        return self._coffee.cost() + self.price  # Adds cost for vanilla
 
     def description(self):
-        return self._coffee.description() + ", Vanilla"
+        return self._coffee.description() + ", " + self.label
+
+# Flattened Coffee: cost and description computed once
+class FrozenCoffee(Coffee):
+    def __init__(self, cost, description):
+        self._cost = cost
+        self._description = description
+
+    def cost(self):
+        return self._cost
+
+    def description(self):
+        return self._description
+
+def freeze(coffee):
+    """
+    Compile a decorated coffee into a FrozenCoffee. Registered add-ons (exactly those types, not
+    subclasses, which may override cost() / description()) are folded iteratively; the walk stops at
+    the first other component, whose cost()/description() is used as is.
+    """
+    addons = []
+    while type(coffee) in ADDONS:
+        addons.append(coffee)
+        coffee = coffee._coffee
+    addons.reverse()  # Innermost first, the order in which cost() / description() build their results
+    total = coffee.cost()
+    for addon in addons:  # Same additions in the same order, so float prices round the same way
+        total += addon.price
+    return FrozenCoffee(total, ", ".join([coffee.description(), *(addon.label for addon in addons)]))
+
+# Bulk Pricing: orders as add-on code sequences, priced from the registered decorators
+class _OrderPrices(dict):
+    """Maps an order (bytes or tuple of add-on codes) to (cost, description), computing each once."""
+    def __init__(self, base):
+        super().__init__()
+        self._base_cost = base.cost()
+        self._base_description = base.description()
+        self._prices = [addon.price for addon in ADDONS]
+        self._labels = [addon.label for addon in ADDONS]
+
+    def __missing__(self, order):
+        prices, labels = self._prices, self._labels
+        cost = self._base_cost
+        for code in order:  # Left to right from the base, like the decorator chain, so floats round the same
+            cost += prices[code]
+        priced = (cost, ", ".join([self._base_description, *(labels[code] for code in order)]))
+        self[order] = priced
+        return priced
+
+def price_orders(orders, base=None):
+    """
+    Price many orders in one pass. Each order lists add-on codes innermost first, e.g.
+    bytes([MilkDecorator.code, SugarDecorator.code]) for SugarDecorator(MilkDecorator(SimpleCoffee())).
+    Returns (costs, descriptions), identical to calling cost() / description() on the decorated objects.
+    """
+    priced = list(map(_OrderPrices(base or SimpleCoffee()).__getitem__, orders))
+    return list(map(itemgetter(0), priced)), list(map(itemgetter(1), priced))
+
+def build_order(codes, base=None):
+    """Object path: the decorated coffee an order describes."""
+    coffee = base or SimpleCoffee()
+    for code in codes:
+        coffee = ADDONS[code](coffee)
+    return coffee
+
+# Benchmark: decorator objects vs bulk pricing
+def benchmark_bulk_pricing(orders=1_000_000, max_addons=5, distinct_addons=16):
+    rng = random.Random(42)
+    menu = [bytes(rng.randrange(len(ADDONS)) for _ in range(rng.randint(0, max_addons))) for _ in range(2_000)]
+    # Orders of distinct_addons random add-ons: with 3 add-ons and 16 slots, nearly every order is new
+    to_code = bytes(i % len(ADDONS) for i in range(256))
+    codes = rng.randbytes(orders * distinct_addons).translate(to_code)
+    days = (("2,000-order menu", rng.choices(menu, k=orders)),
+            ("mostly distinct", [codes[i:i + distinct_addons] for i in range(0, len(codes), distinct_addons)]))
+
+    for label, day in days:
+        start = time.perf_counter()
+        costs, descriptions = price_orders(day)
+        bulk_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        object_costs, object_descriptions = [], []
+        for order in day:
+            coffee = build_order(order)
+            object_costs.append(coffee.cost())
+            object_descriptions.append(coffee.description())
+        object_time = time.perf_counter() - start
+
+        assert costs == object_costs and descriptions == object_descriptions
+        print(f"{orders:,} orders, {label:<16} | objects {object_time:6.2f} s ({orders / object_time:12,.0f}/s)"
+              f" | price_orders {bulk_time:6.2f} s ({orders / bulk_time:12,.0f}/s)"
+              f" | {object_time / bulk_time:5.1f}x")
+
+# Benchmark: live decorator chain vs frozen coffee
+def benchmark_freeze(depths=(10, 100, 1000), calls=10_000):
+    addons = [MilkDecorator, SugarDecorator, VanillaDecorator]
+    for depth in depths:
+        coffee = SimpleCoffee()
+        for i in range(depth):
+            coffee = addons[i % len(addons)](coffee)
+
+        start = time.perf_counter()
+        frozen = freeze(coffee)
+        freeze_time = time.perf_counter() - start
+
+        results = {}
+        for label, target in (("chain", coffee), ("frozen", frozen)):
+            start = time.perf_counter()
+            try:
+                for _ in range(calls):
+                    target.cost()
+                    target.description()
+            except RecursionError:
+                results[label] = "RecursionError"
+                continue
+            results[label] = f"{calls / (time.perf_counter() - start):12,.0f} calls/sec"
+        print(f"depth {depth:>5} | chain {results['chain']:>24} | frozen {results['frozen']:>24}"
+              f" | freeze() {freeze_time * 1e6:8.1f} us")
 
 # Usage Example
 if __name__ == "__main__":
@@ -108,3 +258,21 @@ if __name__ == "__main__":
 
     coffee = VanillaDecorator(coffee)
     print(f"{coffee.description()} - ${coffee.cost()}")
+
+    # Freeze the finished order: same answers, no chain walk per call
+    coffee = freeze(coffee)
+    print(f"{coffee.description()} - ${coffee.cost()} (frozen)")
+
+    # Price a batch of orders at once, without building decorator objects
+    orders = [bytes([MilkDecorator.code]), bytes([MilkDecorator.code, SugarDecorator.code, VanillaDecorator.code])]
+    for cost, description in zip(*price_orders(orders)):
+        print(f"{description} - ${cost} (bulk)")
+
+    # python 5_1_decorator_pattern.py --benchmark
+    if "--benchmark" in sys.argv:
+        benchmark_freeze()
+
+    # python 5_1_decorator_pattern.py --benchmark-bulk [orders]
+    if "--benchmark-bulk" in sys.argv:
+        args = sys.argv[sys.argv.index("--benchmark-bulk") + 1:]
+        benchmark_bulk_pricing(*[int(arg) for arg in args[:1] if arg.isdigit()])
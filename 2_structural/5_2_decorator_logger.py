@@ -21,7 +21,7 @@ Disadvantages:
 
 Explanation:
     1. Component (Logger)
-        Defines the log() method.
+        Defines the log() method: level threshold and lazy %-formatting, then emit() down the chain.
     2. Concrete Component (ConsoleLogger)
         Implements a simple console-based logger.
     3. Decorator (LoggerDecorator)
@@ -31,47 +31,213 @@ Explanation:
         ErrorLevelLogger: Adds log levels (INFO, ERROR, DEBUG).
         FileLogger: Writes logs to a file while still logging to the console.
         JSONLogger: Formats logs as JSON.
+        BackgroundFileLogger: Like FileLogger, but log() only enqueues; a writer thread appends in batches.
+        RotatingFileLogger: Rotates by size / age (optionally gzipped), optionally appending through mmap.
+        TimestampLogger and JSONLogger share a LogClock that formats the date and time once per second.
+    4b. Multi-process Logging (LogCollector / QueueLogger)
+        Worker processes log into a QueueLogger, which sends batches of records over a bounded queue
+        to one collector process; only the collector runs the file-writing chain.
+    4c. Structured Records (log_record / JSONRecordLogger)
+        log_record(message, **fields) sends a dict down the chain; TimestampLogger, ErrorLevelLogger and
+        FieldLogger add keys to it instead of prefixing text. JSONRecordLogger serializes it once,
+        with an encoder generated per key layout, so only the values are escaped per call.
+    5. Compiled Chains (compile_logger)
+        Walks a decorator stack once and generates one function producing the same output,
+        without a call frame and an intermediate string per layer.
     5. Client Code
         Starts with a basic console logger.
         Dynamically wraps it with decorators to add timestamps, error levels, file logging, and JSON formatting.
 """
 from abc import ABC, abstractmethod
 import datetime
+import functools
+import gzip
 import json
+from json.encoder import encode_basestring_ascii
+import mmap
+import multiprocessing
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+# Log levels
+DEBUG, INFO, WARNING, ERROR = 10, 20, 30, 40
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARNING", ERROR: "ERROR"}
+
+# Old-style loggers (log() overridden, emit() not): ids of those whose log() is running on this thread
+_legacy_calls = threading.local()
+
+def _active_legacy_logs():
+    try:
+        return _legacy_calls.active
+    except AttributeError:
+        _legacy_calls.active = active = set()
+        return active
+
+def _track_legacy_log(log):
+    @functools.wraps(log)
+    def tracked(self, *args, **kwargs):
+        active = _active_legacy_logs()
+        nested = id(self) in active
+        active.add(id(self))
+        try:
+            return log(self, *args, **kwargs)
+        finally:
+            if not nested:
+                active.discard(id(self))
+    return tracked
+
+def _emit_via_log(inherited_emit):
+    def emit(self, message, level=None):
+        if id(self) in _active_legacy_logs():
+            inherited_emit(self, message, level)  # super().log() from inside log(): go on down the chain
+        else:
+            self.log(message)
+    return emit
 
 # Component Interface (Logger)
 class Logger(ABC):
+    """
+    log(message, *args, level=...) is the public entry point. It runs once, on the logger it is called on
+    (normally the outermost decorator): calls below min_level return after one comparison, and only
+    enabled calls %-format message with args. The finished text then travels down the chain via emit().
+    Set Logger.min_level for a global threshold, or min_level on the outermost logger for one chain.
+    Calls without a level are always logged.
+    log_record(message, *args, level=..., **fields) is the structured variant: the chain passes a dict
+    via emit_record(), and layers that don't know records receive it as JSON text through emit().
+
+    Migrating a logger written against the older interface (overriding log(self, message) only):
+    nothing to do. A subclass that overrides log() but not emit() gets emit() routed to its log(), so
+    e.g. a decorator whose log() upper-cases and calls self._logger.log() or super().log() still runs
+    inside a chain; super().log() carries on with the emit() the class inherits. Its log() sees the
+    finished text, and levels are not passed on from there. Override emit() instead to take part in
+    thresholds and compile_logger's fusing.
+    """
+    min_level = DEBUG
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if "log" in cls.__dict__ and "emit" not in cls.__dict__:
+            cls.log, cls.emit = _track_legacy_log(cls.__dict__["log"]), _emit_via_log(cls.emit)
+
+    def log(self, message, *args, level=None):
+        if level is not None and level < self.min_level:
+            return
+        if args:
+            message = message % args
+        self.emit(message, level)
+
+    def log_record(self, message, *args, level=None, **fields):
+        if level is not None and level < self.min_level:
+            return
+        if args:
+            message = message % args
+        record = {"message": message}
+        if fields:
+            record.update(fields)
+        self.emit_record(record, level)
+
+    def emit_record(self, record, level=None):
+        self.emit(json.dumps(record), level)
+
     @abstractmethod
-    def log(self, message):
+    def emit(self, message, level=None):
         pass
 
 # Concrete Component (Basic Console Logger)
 class ConsoleLogger(Logger):
-    def log(self, message):
+    def emit(self, message, level=None):
         print(message)
 
+# Concrete Component (Discards messages; for file-only logging and benchmarks)
+class NullLogger(Logger):
+    def emit(self, message, level=None):
+        pass
+
 # Decorator (Base Wrapper)
 class LoggerDecorator(Logger):
     def __init__(self, logger):
         self._logger = logger
 
-    def log(self, message):
-        self._logger.log(message)
+    def emit(self, message, level=None):
+        self._logger.emit(message, level)
+
+# Shared clock: strftime / isoformat only when the second changes
+class LogClock:
+    """
+    Renders the second-resolution part of timestamps once per second; microseconds are appended
+    with plain integer formatting. The cache is one tuple swapped atomically, so threads can share it.
+    """
+    def __init__(self):
+        self._cached = (None, "", "")  # (epoch second, "%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S")
+
+    def _render(self, second):
+        now = datetime.datetime.fromtimestamp(second)
+        self._cached = cached = (second, now.strftime("%Y-%m-%d %H:%M:%S"), now.strftime("%Y-%m-%dT%H:%M:%S"))
+        return cached
+
+    def timestamp(self):
+        """Same text as datetime.now().strftime("%Y-%m-%d %H:%M:%S")."""
+        second = time.time_ns() // 1_000_000_000
+        cached = self._cached
+        if cached[0] != second:
+            cached = self._render(second)
+        return cached[1]
+
+    def isoformat(self):
+        """Same text as datetime.now().isoformat()."""
+        now_us = time.time_ns() // 1_000
+        second, micros = now_us // 1_000_000, now_us % 1_000_000
+        cached = self._cached
+        if cached[0] != second:
+            cached = self._render(second)
+        return cached[2] + "." + str(1_000_000 + micros)[1:] if micros else cached[2]  # Zero-padded to 6
+
+log_clock = LogClock()
 
 # Concrete Decorator 1: Timestamp Logger
 class TimestampLogger(LoggerDecorator):
-    def log(self, message):
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        super().log(f"[{timestamp}] {message}")
+    def __init__(self, logger, clock=log_clock):
+        super().__init__(logger)
+        self.clock = clock
+
+    def emit(self, message, level=None):
+        timestamp = self.clock.timestamp()
+        super().emit(f"[{timestamp}] {message}", level)
+
+    def emit_record(self, record, level=None):
+        record["timestamp"] = self.clock.isoformat()
+        self._logger.emit_record(record, level)
 
 # Concrete Decorator 2: Error Level Logger
 class ErrorLevelLogger(LoggerDecorator):
     def __init__(self, logger, level="INFO"):
         super().__init__(logger)
-        self.level = level
+        self.level = level  # Label for calls made without a level
 
-    def log(self, message):
-        super().log(f"[{self.level}] {message}")
+    def emit(self, message, level=None):
+        label = self.level if level is None else LEVEL_NAMES.get(level, level)
+        super().emit(f"[{label}] {message}", level)
+
+    def emit_record(self, record, level=None):
+        record["level"] = self.level if level is None else LEVEL_NAMES.get(level, level)
+        self._logger.emit_record(record, level)
+
+# Concrete Decorator 2b: Field Logger (Adds fixed key/values to structured records)
+class FieldLogger(LoggerDecorator):
+    def __init__(self, logger, **fields):
+        super().__init__(logger)
+        self.fields = fields
+
+    def emit(self, message, level=None):
+        self.emit_record({"message": message}, level)
+
+    def emit_record(self, record, level=None):
+        record.update(self.fields)
+        self._logger.emit_record(record, level)
 
 # Concrete Decorator 3: File Logger (Writes logs to a file)
 class FileLogger(LoggerDecorator):
@@ -79,16 +245,743 @@ class FileLogger(LoggerDecorator):
         super().__init__(logger)
         self.filename = filename
 
-    def log(self, message):
+    def emit(self, message, level=None):
         with open(self.filename, "a") as file:
             file.write(message + "\n")
-        super().log(message)  # Also log to console
+        super().emit(message, level)  # Also log to console
+
+# Concrete Decorator 3b: Background File Logger (Batched writes on a worker thread)
+class BackgroundFileLogger(LoggerDecorator):
+    """
+    log() puts the message on a bounded queue and returns; a writer thread keeps the file open,
+    drains the queue in batches and flushes once flush_bytes are buffered or every flush_interval seconds.
+    When the queue is full, overflow decides what log() does:
+        "block": wait for room.
+        "drop":  discard the message (counted in self.dropped).
+        "count": discard it too, and write a "N messages dropped" line once the writer catches up.
+    close() (or leaving a with block) writes everything still queued and stops the thread.
+    The file is opened here, so a bad path fails in the caller. If writing fails later, the writer
+    stops and keeps the error in self.error; from then on log() raises instead of blocking or dropping.
+    """
+    _STOP = object()
+
+    def __init__(self, logger, filename="logfile.txt", max_queue=10_000, overflow="block",
+                 batch_size=1_000, flush_bytes=64 * 1024, flush_interval=0.5):
+        super().__init__(logger)
+        if overflow not in ("block", "drop", "count"):
+            raise ValueError(f"Unknown overflow policy: {overflow!r}")
+        self.filename = filename
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.error = None
+        self._dropped_lock = threading.Lock()  # Producers on several threads count drops
+        self._reported_dropped = 0
+        self._queue = queue.SimpleQueue()
+        self._room = threading.Semaphore(max_queue)  # Bounds the queue; the writer gives room back
+        self._closed = False
+        self._closed_lock = threading.Lock()  # Nothing is queued after close() has queued _STOP
+        self._file = open(filename, "a", buffering=flush_bytes)
+        self._writer = threading.Thread(target=self._write_forever, name="BackgroundFileLogger", daemon=True)
+        self._writer.start()
+
+    def emit(self, message, level=None):
+        self._enqueue(message)
+        super().emit(message, level)  # Also log to console
+
+    def _enqueue(self, message):
+        self._check_writing()
+        if not self._room.acquire(blocking=False):
+            if self.overflow != "block":
+                with self._dropped_lock:
+                    self.dropped += 1
+                return
+            while not self._room.acquire(timeout=0.1):  # Wait for room, but notice if the writer dies meanwhile
+                self._check_writing()
+        with self._closed_lock:
+            if not self._closed:
+                self._queue.put(message)
+                return
+        self._room.release()
+        self._check_writing()  # close() won the race: raises
+
+    def _check_writing(self):
+        if self._closed or self.error is not None or not self._writer.is_alive():
+            raise RuntimeError(f"BackgroundFileLogger for {self.filename} is not writing: "
+                               f"{self.error or 'closed'}") from self.error
+
+    def _write_forever(self):
+        try:
+            self._write_batches(self._file)
+        except Exception as error:
+            self.error = error
+            print(f"BackgroundFileLogger: writing {self.filename} failed: {error}", file=sys.stderr)
+        finally:
+            try:
+                self._file.close()
+            except OSError:
+                pass
+
+    def _write_batches(self, file):
+        pending_bytes = 0
+        last_flush = time.monotonic()
+        stopping = False
+        while not stopping:
+            try:
+                batch = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if self._STOP in batch:
+                batch.remove(self._STOP)
+                stopping = True
+            if batch:
+                self._room.release(len(batch))
+            if self.overflow == "count" and self.dropped != self._reported_dropped:
+                dropped = self.dropped
+                batch.append(f"[BackgroundFileLogger] {dropped - self._reported_dropped} messages dropped")
+                self._reported_dropped = dropped
+            if batch:
+                chunk = "\n".join(batch) + "\n"
+                file.write(chunk)
+                pending_bytes += len(chunk)
+            if pending_bytes >= self.flush_bytes or time.monotonic() - last_flush >= self.flush_interval \
+                    or stopping:
+                file.flush()
+                pending_bytes = 0
+                last_flush = time.monotonic()
+
+    def close(self):
+        """Write everything still queued, flush and stop the writer thread."""
+        with self._closed_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(self._STOP)  # Queued behind every accepted message; log() refuses new ones
+        self._writer.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# Concrete Decorator 3c: Rotating File Logger (Size / time rotation, optional mmap appends)
+def _unpadded_size(fd, size):
+    """Length without the NUL padding a crash may have left behind a mapped file."""
+    end = size
+    while end > 0:
+        start = max(0, end - 65536)
+        block = os.pread(fd, end - start, start).rstrip(b"\0")
+        if block:
+            return start + len(block)
+        end = start
+    return 0
+
+class _Segment:
+    """One open log file. With use_mmap, space is reserved segment_bytes at a time and writes are memcpy."""
+    def __init__(self, path, use_mmap, segment_bytes):
+        self.path = path
+        self.opened_at = time.monotonic()
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        self._segment_bytes = segment_bytes
+        self._map = None
+        self.size = os.fstat(self._fd).st_size
+        if use_mmap:
+            self.size = _unpadded_size(self._fd, self.size)
+            self._map_capacity(self.size + segment_bytes)
+        else:
+            self._file = os.fdopen(self._fd, "ab")
+
+    def _map_capacity(self, capacity):
+        if self._map is not None:
+            self._map.close()
+        os.ftruncate(self._fd, capacity)
+        self._map = mmap.mmap(self._fd, capacity)
+
+    def write(self, data):
+        end = self.size + len(data)
+        if self._map is None:
+            self._file.write(data)
+        else:
+            if end > len(self._map):
+                self._map_capacity(end + self._segment_bytes)
+            self._map[self.size:end] = data
+        self.size = end
+
+    def close(self):
+        if self._map is None:
+            self._file.close()
+            return
+        self._map.close()  # No msync: dirty pages are already in the page cache (see crash safety)
+        os.ftruncate(self._fd, self.size)  # Drop the unused reserved space
+        os.close(self._fd)
+
+class RotatingFileLogger(LoggerDecorator):
+    """
+    Appends to filename and rotates it to filename.1, filename.2, ... (gzipped with compress=True)
+    after max_bytes or every interval seconds, keeping backup_count rotated files.
+
+    Only a pointer swap happens inside log(): a maintenance thread opens the next segment in advance
+    (as filename.next.N) and, after a swap, closes the old segment, renames both files, compresses
+    and prunes. If rotations outrun it, log() opens the next segment itself (one open() call).
+
+    use_mmap=True maps the file and reserves segment_bytes at a time (at least max_bytes, so a segment
+    is never remapped inside log()), so a write is a memcpy into the page cache instead of a write() call.
+
+    Crash safety:
+        Process crash: mmap mode loses nothing already logged, because the kernel owns the dirty pages.
+            The file may end in NUL padding, which is removed when it is reopened. File mode can lose
+            what is still in Python's write buffer (at most 8 KiB).
+        Power loss / kernel crash: both modes lose whatever the OS had not written back; nothing fsyncs.
+        A crash in the middle of a rotation can leave a filename.next.N file behind, holding the lines
+            logged after that rotation. On startup such files are appended to filename (their lines are
+            the newest) and only then removed; spares are numbered past any that still exist.
+    """
+    def __init__(self, logger, filename="logfile.txt", max_bytes=10 * 2 ** 20, interval=None, backup_count=5,
+                 compress=False, use_mmap=False, segment_bytes=4 * 2 ** 20):
+        super().__init__(logger)
+        self.filename = filename
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.compress = compress
+        self._segment_args = (use_mmap, max(segment_bytes, max_bytes or 0))
+        self._lock = threading.Lock()
+        self._next_ids = iter(range(self._recover() + 1, sys.maxsize))
+        self._segment = _Segment(filename, *self._segment_args)
+        self._next = None  # Pre-opened by the maintenance thread
+        self._sequence = max(self._backups() or [(0, "")])[0]
+        self._jobs = queue.Queue()
+        self._maintainer = threading.Thread(target=self._maintain, name="RotatingFileLogger", daemon=True)
+        self._maintainer.start()
+        self._jobs.put("prepare")
+
+    def emit(self, message, level=None):
+        data = (message + "\n").encode()
+        with self._lock:
+            segment = self._segment
+            if (self.max_bytes is not None and segment.size + len(data) > self.max_bytes and segment.size) or \
+                    (self.interval is not None and time.monotonic() - segment.opened_at >= self.interval):
+                segment = self._rotate()
+            segment.write(data)
+        super().emit(message, level)  # Also log to console
+
+    def _new_segment(self):
+        path = f"{self.filename}.next.{next(self._next_ids)}"
+        while os.path.exists(path):  # Never reuse (and later delete) a file we didn't create
+            path = f"{self.filename}.next.{next(self._next_ids)}"
+        return _Segment(path, *self._segment_args)
+
+    def _recover(self):
+        """
+        Append the contents of filename.next.N files left by a crash mid-rotation to filename, in order,
+        removing each only once it has been copied. Returns the highest N seen.
+        """
+        directory = os.path.dirname(self.filename) or "."
+        prefix = os.path.basename(self.filename) + ".next."
+        leftovers = sorted((int(name[len(prefix):]), os.path.join(directory, name)) for name in os.listdir(directory)
+                           if name.startswith(prefix) and name[len(prefix):].isdigit())
+        for _, path in leftovers:
+            with open(path, "rb") as source:
+                size = _unpadded_size(source.fileno(), os.fstat(source.fileno()).st_size)
+                if size:
+                    fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o644)
+                    try:
+                        end = _unpadded_size(fd, os.fstat(fd).st_size)
+                        os.ftruncate(fd, end)  # Drop mmap padding before appending after it
+                        while size > 0:
+                            chunk = source.read(min(size, 2 ** 20))
+                            end += os.pwrite(fd, chunk, end)
+                            size -= len(chunk)
+                    finally:
+                        os.close(fd)
+            os.remove(path)
+        return leftovers[-1][0] if leftovers else 0
+
+    def _rotate(self):
+        """Swap in the next segment (lock held); everything else is queued for the maintenance thread."""
+        old, new = self._segment, self._next or self._new_segment()
+        new.opened_at = time.monotonic()  # A spare was opened ahead of time; its interval starts now
+        self._segment, self._next = new, None
+        self._sequence += 1
+        self._jobs.put((old, new, self._sequence))
+        return new
+
+    def _maintain(self):
+        while True:
+            job = self._jobs.get()
+            if job == "prepare":
+                pass
+            elif job == "stop":
+                with self._lock:
+                    spare, self._next = self._next, None
+                if spare is not None:
+                    spare.close()
+                    os.remove(spare.path)
+                return
+            else:
+                old, new, sequence = job
+                old.close()
+                rotated = f"{self.filename}.{sequence}"
+                os.replace(old.path, rotated)
+                os.replace(new.path, self.filename)
+                new.path = self.filename
+                if self.compress:
+                    with open(rotated, "rb") as source, gzip.open(rotated + ".gz", "wb") as target:
+                        shutil.copyfileobj(source, target, 2 ** 20)  # Big chunks: zlib runs without the GIL
+                    os.remove(rotated)
+                for _, path in sorted(self._backups())[:-self.backup_count or None]:
+                    os.remove(path)
+            spare = self._new_segment()  # Opened (and mapped) outside the lock
+            with self._lock:
+                if self._next is None:
+                    self._next, spare = spare, None
+            if spare is not None:
+                spare.close()
+                os.remove(spare.path)
+
+    def _backups(self):
+        """[(sequence, path)] of rotated files."""
+        directory = os.path.dirname(self.filename) or "."
+        prefix = os.path.basename(self.filename) + "."
+        backups = []
+        for name in os.listdir(directory):
+            suffix = name[len(prefix):].removesuffix(".gz")
+            if name.startswith(prefix) and suffix.isdigit():
+                backups.append((int(suffix), os.path.join(directory, name)))
+        return backups
+
+    def close(self):
+        """Finish pending rotations, then close the active file."""
+        self._jobs.put("stop")
+        self._maintainer.join()
+        with self._lock:
+            self._segment.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+# Multi-process Logging: workers enqueue, one collector process writes
+class QueueLogger(Logger):
+    """
+    Worker-side component: collects (message, level) records and puts them on the collector's queue
+    batch_size at a time. A daemon thread, started by the first emit(), also flushes whatever is
+    pending every flush_interval seconds, so a quiet worker does not sit on its records. put() blocks
+    while the queue is full, which is the backpressure. Safe to share between threads; pickles
+    without its lock and thread, so it can be handed to a multiprocessing.Process. Call close()
+    (or use a with block) before the worker exits.
+    """
+    def __init__(self, queue, batch_size=100, flush_interval=0.5):
+        self._queue = queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._setup()
+
+    def _setup(self):
+        self._batch = []
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = None
+
+    def __getstate__(self):
+        return {"_queue": self._queue, "batch_size": self.batch_size, "flush_interval": self.flush_interval}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._setup()
+
+    def emit(self, message, level=None):
+        with self._lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_forever, daemon=True)
+                self._flusher.start()
+            self._batch.append((message, level))
+            if len(self._batch) >= self.batch_size:
+                self._flush_locked()
+
+    def _flush_forever(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def _flush_locked(self):
+        if self._batch:
+            batch, self._batch = self._batch, []
+            self._queue.put(batch)
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+def _collect(log_queue, chain_factory):
+    """Collector process: run every record through one chain until the stop sentinel arrives."""
+    chain = chain_factory()
+    while True:
+        batch = log_queue.get()
+        if batch is None:
+            break
+        for message, level in batch:
+            chain.emit(message, level)
+    layer = chain
+    while layer is not None:  # Let layers that buffer (BackgroundFileLogger, RotatingFileLogger) drain
+        if hasattr(layer, "close"):
+            layer.close()
+        layer = getattr(layer, "_logger", None)
+
+class LogCollector:
+    """
+    Owns the collector process. chain_factory() builds the real chain inside it (so it must be picklable,
+    e.g. functools.partial(FileLogger, NullLogger(), "app.log")). Hand collector.logger() to each worker.
+    close() waits until every record already queued has been written.
+    """
+    def __init__(self, chain_factory, max_queue=1_000, context=None):
+        context = context or multiprocessing.get_context()
+        self._queue = context.Queue(max_queue)  # Bounded in batches
+        self._process = context.Process(target=_collect, args=(self._queue, chain_factory),
+                                        name="LogCollector", daemon=True)
+        self._process.start()
+
+    def logger(self, batch_size=100, flush_interval=0.5):
+        return QueueLogger(self._queue, batch_size, flush_interval)
+
+    def close(self):
+        self._queue.put(None)  # Behind every batch already sent by finished workers
+        self._process.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
 # Concrete Decorator 4: JSON Logger (Formats log messages as JSON)
 class JSONLogger(LoggerDecorator):
-    def log(self, message):
-        log_entry = {"timestamp": datetime.datetime.now().isoformat(), "message": message}
-        super().log(json.dumps(log_entry))
+    def __init__(self, logger, clock=log_clock):
+        super().__init__(logger)
+        self.clock = clock
+
+    def emit(self, message, level=None):
+        log_entry = {"timestamp": self.clock.isoformat(), "message": message}
+        super().emit(json.dumps(log_entry), level)
+
+# Concrete Decorator 4b: JSON Record Logger (Serializes structured records once)
+class JSONRecordLogger(LoggerDecorator):
+    """
+    Drop-in for JSONLogger (same text for log()), and the sink for log_record(): the record becomes
+    '{"timestamp": ..., <static_fields>, <record fields>}' in one pass. For each key layout seen, an encoder is
+    generated once with the keys, separators and static_fields already encoded; per call only the values
+    are encoded (encode_basestring_ascii for str, str() for int, json.dumps otherwise), and the clock's
+    timestamp needs no escaping at all. A record that already has "timestamp" (from TimestampLogger) keeps its own.
+    """
+    def __init__(self, logger, clock=log_clock, **static_fields):
+        super().__init__(logger)
+        self.clock = clock
+        self.static_fields = static_fields
+        self._encoders = {}  # tuple of record keys -> generated encode(record, clock)
+
+    def emit(self, message, level=None):
+        self.emit_record({"message": message}, level)
+
+    def emit_record(self, record, level=None):
+        keys = tuple(record)
+        encode = self._encoders.get(keys) or self._compile(keys)
+        self._logger.emit(encode(record, self.clock), level)
+
+    def _compile(self, keys):
+        pieces = []  # Expressions of the generated return statement, joined with +
+        literal = "{"  # Encoded text not yet added to pieces
+        if "timestamp" not in keys:
+            pieces += [repr(literal + '"timestamp": "'), "clock.isoformat()"]
+            literal = '", '
+        for key, value in self.static_fields.items():
+            if key not in keys:
+                literal += f"{json.dumps(key)}: {json.dumps(value)}, "
+        for i, key in enumerate(keys):
+            value = f"v{i}"
+            pieces += [repr(literal + json.dumps(key) + ": "),
+                       f"(enc({value}) if {value}.__class__ is str else "
+                       f"str({value}) if {value}.__class__ is int else dumps({value}))"]
+            literal = ", "
+        pieces.append(repr("}"))
+        source = (f"def encode(record, clock):\n"
+                  f"    {''.join(f'v{i}, ' for i in range(len(keys)))}= record.values()\n"
+                  f"    return {' + '.join(pieces)}\n")
+        namespace = {"enc": encode_basestring_ascii, "dumps": json.dumps}
+        exec(source, namespace)
+        self._encoders[keys] = encode = namespace["encode"]
+        return encode
+
+# Compiled Chain: one generated function instead of one emit() frame per layer
+def compile_logger(logger):
+    """
+    Return log(message, *args, level=None) equivalent to logger.log, generated from the decorator stack.
+    Adjacent prefix layers are fused into one f-string, and sinks write the text as it stands at their layer.
+    Layers of other (or subclassed) types are called through their own emit().
+    The chain's configuration, min_level included, is captured at compile time.
+    """
+    namespace = {"LEVEL_NAMES": LEVEL_NAMES, "json_dumps": json.dumps, "min_level": logger.min_level}
+    lines = ["def log(message, *args, level=None):",
+             "    if level is not None and level < min_level:",
+             "        return",
+             "    if args:",
+             "        message = message % args"]
+    text = "message"
+    prefixes = []  # f-string pieces not yet applied; inner layers' prefixes go in front
+
+    def materialize():
+        nonlocal text
+        if prefixes:
+            lines.append(f"    text_{len(lines)} = f\"{''.join(prefixes)}{{{text}}}\"")
+            text = f"text_{len(lines) - 1}"
+            prefixes.clear()
+        return text
+
+    layer = logger
+    while layer is not None:
+        name = f"layer_{len(namespace)}"
+        namespace[name] = layer
+        kind = type(layer)
+        next_layer = getattr(layer, "_logger", None)
+        if kind is TimestampLogger:
+            lines.append(f"    stamp_{name} = {name}.clock.timestamp()")
+            prefixes.insert(0, f"[{{stamp_{name}}}] ")
+        elif kind is ErrorLevelLogger:
+            lines.append(f"    label_{name} = {name}.level if level is None else LEVEL_NAMES.get(level, level)")
+            prefixes.insert(0, f"[{{label_{name}}}] ")
+        elif kind is FileLogger:
+            written = materialize()
+            lines.append(f"    with open({name}.filename, 'a') as file:")
+            lines.append(f"        file.write({written} + '\\n')")
+        elif kind is BackgroundFileLogger:
+            lines.append(f"    {name}._enqueue({materialize()})")
+        elif kind is JSONLogger:
+            lines.append(f"    text_{name} = json_dumps({{'timestamp': {name}.clock.isoformat(), "
+                         f"'message': {materialize()}}})")
+            text = f"text_{name}"
+        elif kind is LoggerDecorator:
+            pass
+        elif kind is ConsoleLogger:
+            lines.append(f"    print({materialize()})")
+            next_layer = None
+        elif kind is NullLogger:
+            next_layer = None
+        else:
+            lines.append(f"    {name}.emit({materialize()}, level)")
+            next_layer = None
+        layer = next_layer
+
+    source = "\n".join(lines) + "\n"
+    exec(compile(source, "<compiled logger>", "exec"), namespace)
+    compiled = namespace["log"]
+    compiled.source = source
+    return compiled
+
+# Benchmark: synchronous FileLogger vs BackgroundFileLogger
+def benchmark_file_loggers(messages=200_000, filename="benchmark_log.txt"):
+    def run(logger):
+        latencies = []
+        start = time.perf_counter()
+        for i in range(messages):
+            before = time.perf_counter_ns()
+            logger.log(f"request {i} handled")
+            latencies.append(time.perf_counter_ns() - before)
+        if isinstance(logger, BackgroundFileLogger):
+            logger.close()  # Throughput includes draining the queue
+        elapsed = time.perf_counter() - start
+        latencies.sort()
+        with open(filename) as file:
+            written = sum(1 for _ in file)
+        os.remove(filename)
+        return elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)], written
+
+    for label, make_logger in (
+            ("FileLogger", lambda: FileLogger(NullLogger(), filename)),
+            ("BackgroundFileLogger(block)", lambda: BackgroundFileLogger(NullLogger(), filename)),
+            ("BackgroundFileLogger(drop)", lambda: BackgroundFileLogger(NullLogger(), filename, overflow="drop"))):
+        elapsed, p50, p99, written = run(make_logger())
+        print(f"{label:<28} {messages / elapsed:10,.0f} msg/s | log() p50 {p50 / 1e3:6.1f} us,"
+              f" p99 {p99 / 1e3:6.1f} us | {written:,} lines written")
+
+# Benchmark: datetime formatting per message vs the shared LogClock
+def benchmark_log_clock(messages=1_000_000):
+    now = datetime.datetime.now
+    timings = {}
+    for label, stamp in (("datetime.now().strftime", lambda: now().strftime("%Y-%m-%d %H:%M:%S")),
+                         ("LogClock.timestamp", log_clock.timestamp),
+                         ("datetime.now().isoformat", lambda: now().isoformat()),
+                         ("LogClock.isoformat", log_clock.isoformat)):
+        start = time.perf_counter_ns()
+        for _ in range(messages):
+            stamp()
+        timings[label] = (time.perf_counter_ns() - start) / messages
+        print(f"{label:<26} {timings[label]:7.0f} ns/message")
+    print(f"strftime path {timings['datetime.now().strftime'] / timings['LogClock.timestamp']:.1f}x faster, "
+          f"isoformat path {timings['datetime.now().isoformat'] / timings['LogClock.isoformat']:.1f}x faster")
+
+# Benchmark: disabled and enabled calls through a 4-layer chain
+def benchmark_levels(calls=1_000_000):
+    def chain():
+        return TimestampLogger(ErrorLevelLogger(JSONLogger(NullLogger())))
+
+    def per_call(fn):
+        start = time.perf_counter_ns()
+        for i in range(calls):
+            fn(i)
+        return (time.perf_counter_ns() - start) / calls
+
+    logger = chain()
+    logger.min_level = INFO
+    disabled = per_call(lambda i: logger.log("cache miss for key %s", i, level=DEBUG))
+    eager_disabled = per_call(lambda i: logger.log(f"cache miss for key {i}", level=DEBUG))
+    enabled = per_call(lambda i: logger.log("cache miss for key %s", i, level=WARNING))
+    print(f"disabled, lazy %-args        {disabled:7.0f} ns/call")
+    print(f"disabled, f-string argument  {eager_disabled:7.0f} ns/call")
+    print(f"enabled (4 layers)           {enabled:7.0f} ns/call")
+
+# Benchmark: 6-layer chain, decorator objects vs compile_logger
+def benchmark_compiled(calls=200_000):
+    class FixedClock:  # Deterministic timestamps so both outputs can be compared byte for byte
+        def timestamp(self):
+            return "2025-01-01 12:00:00"
+
+        def isoformat(self):
+            return "2025-01-01T12:00:00.123456"
+
+    class CollectingLogger(Logger):
+        def __init__(self):
+            self.lines = []
+
+        def emit(self, message, level=None):
+            self.lines.append(message)
+
+    def chain(sink, filename=None):
+        # With filename, layer 3 is a FileLogger (one file open per call); without, a pass-through decorator
+        def middle(inner):
+            return FileLogger(inner, filename) if filename else LoggerDecorator(inner)
+        return TimestampLogger(ErrorLevelLogger(middle(JSONLogger(ErrorLevelLogger(
+            TimestampLogger(sink, FixedClock()), "AUDIT"), FixedClock())), "ERROR"), FixedClock())
+
+    for with_file in (False, True):
+        outputs = {}
+        for label in ("objects", "compiled"):
+            filename = f"benchmark_{label}.txt" if with_file else None
+            sink = CollectingLogger()
+            logger = chain(sink, filename)
+            log = logger.log if label == "objects" else compile_logger(logger)
+            start = time.perf_counter_ns()
+            for i in range(calls):
+                log("request %d handled", i, level=(INFO if i % 2 else None))
+            elapsed = (time.perf_counter_ns() - start) / calls
+            written = b""
+            if filename:
+                with open(filename, "rb") as file:
+                    written = file.read()
+                os.remove(filename)
+            outputs[label] = (written, sink.lines)
+            print(f"6 layers {'with FileLogger' if with_file else 'in memory':<15} | {label:<9} {elapsed:7.0f} ns/call")
+        assert outputs["objects"] == outputs["compiled"], "compiled chain must produce identical output"
+
+# Benchmark: records/sec of JSONRecordLogger against JSONLogger and json.dumps per record
+def benchmark_json_records(calls=200_000):
+    for label, logger, log in (
+            ("JSONLogger, log()", JSONLogger(NullLogger()), "log"),
+            ("JSONRecordLogger, log()", JSONRecordLogger(NullLogger()), "log"),
+            ("log_record(), json.dumps", TimestampLogger(ErrorLevelLogger(FieldLogger(
+                NullLogger(), service="checkout"))), "log_record"),
+            ("log_record(), JSONRecordLogger", TimestampLogger(ErrorLevelLogger(FieldLogger(
+                JSONRecordLogger(NullLogger()), service="checkout"))), "log_record")):
+        log = getattr(logger, log)
+        extra = {"user_id": 42, "path": "/cart"} if label.startswith("log_record") else {}
+        start = time.perf_counter()
+        for i in range(calls):
+            log("request handled", **extra)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<31} {calls / elapsed:>12,.0f} records/s")
+
+# Benchmark: sustained throughput and worst-case log() latency while rotating
+def benchmark_rotation(megabytes=200, max_block=0.05, directory="rotation_benchmark"):
+    line = "x" * 99  # 100 bytes with the newline
+    messages = megabytes * 2 ** 20 // 100
+    os.makedirs(directory, exist_ok=True)
+    filename = os.path.join(directory, "app.log")
+    for label, make_logger in (
+            ("FileLogger", lambda: FileLogger(NullLogger(), filename)),
+            ("Rotating, file", lambda: RotatingFileLogger(NullLogger(), filename, max_bytes=16 * 2 ** 20)),
+            ("Rotating, mmap", lambda: RotatingFileLogger(NullLogger(), filename, max_bytes=16 * 2 ** 20,
+                                                          use_mmap=True)),
+            ("Rotating, mmap + gzip", lambda: RotatingFileLogger(NullLogger(), filename, max_bytes=16 * 2 ** 20,
+                                                                 use_mmap=True, compress=True))):
+        logger = make_logger()
+        count = messages if not isinstance(logger, FileLogger) else messages // 20  # open() per line is slow
+        worst = 0
+        start = time.perf_counter()
+        for _ in range(count):
+            before = time.perf_counter()
+            logger.log(line)
+            worst = max(worst, time.perf_counter() - before)
+        if isinstance(logger, RotatingFileLogger):
+            logger.close()
+        elapsed = time.perf_counter() - start
+        print(f"{label:<22} {count * 100 / 2 ** 20 / elapsed:8.1f} MB/s | worst log() {worst * 1e3:6.2f} ms")
+        if isinstance(logger, RotatingFileLogger):
+            assert worst <= max_block, f"rotation blocked log() for {worst * 1e3:.1f} ms"
+        shutil.rmtree(directory)
+        os.makedirs(directory)
+    shutil.rmtree(directory)
+
+# Stress test: 16 processes logging through one collector; no line lost or torn
+def _stress_worker(queue_logger, worker_id, lines):
+    with queue_logger:
+        logger = ErrorLevelLogger(queue_logger, "INFO")
+        for i in range(lines):
+            logger.log("worker=%02d line=%06d payload=%s", worker_id, i, "x" * (i % 200))
+
+def multiprocess_stress_test(processes=16, lines=5_000, filename="multiprocess_log.txt"):
+    if os.path.exists(filename):
+        os.remove(filename)
+    start = time.perf_counter()
+    with LogCollector(functools.partial(FileLogger, NullLogger(), filename), max_queue=64) as collector:
+        workers = [multiprocessing.Process(target=_stress_worker, args=(collector.logger(), worker_id, lines))
+                   for worker_id in range(processes)]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+    elapsed = time.perf_counter() - start
+
+    next_line = [0] * processes
+    with open(filename) as file:
+        for text in file:
+            prefix, _, payload = text.rstrip("\n").rpartition(" payload=")
+            worker_id, line = (int(field.split("=")[1]) for field in prefix.split(" ")[1:])
+            assert prefix.startswith("[INFO] worker=") and payload == "x" * (line % 200), f"torn: {text!r}"
+            assert line == next_line[worker_id], f"worker {worker_id}: line {line} out of order"
+            next_line[worker_id] += 1
+    os.remove(filename)
+    assert next_line == [lines] * processes, "lines were lost"
+    print(f"{processes} processes x {lines:,} lines: all {processes * lines:,} written intact, in order, "
+          f"{processes * lines / elapsed:,.0f} lines/s")
 
 # Usage Example
 if __name__ == "__main__":
@@ -113,3 +1006,71 @@ if __name__ == "__main__":
     # Logger with JSON format
     logger = JSONLogger(logger)
     logger.log("This log is formatted as JSON")
+
+    # Structured record: fields are collected on the way down and serialized once
+    structured = ErrorLevelLogger(FieldLogger(JSONRecordLogger(ConsoleLogger()), service="blog"))
+    structured.log_record("Order %s placed", 1042, level=WARNING, user_id=7)
+
+    # Logger whose file writes happen in batches on a background thread
+    with BackgroundFileLogger(ConsoleLogger()) as background_logger:
+        background_logger.log("This log is written to the file by a background thread")
+
+    # Logger that rotates logfile.txt at 1 MiB into gzipped backups, appending through mmap
+    with RotatingFileLogger(ConsoleLogger(), max_bytes=2 ** 20, compress=True, use_mmap=True) as rotating_logger:
+        rotating_logger.log("This log is appended through a memory map")
+
+    # Levels: the threshold is checked once, at the outermost logger
+    logger.min_level = WARNING
+    logger.log("Cache miss for %s", "user:42", level=DEBUG)  # Dropped before any formatting
+    logger.log("Disk %d%% full", 91, level=WARNING)
+
+    # The same chain compiled into one function
+    fast_log = compile_logger(logger)
+    fast_log("Disk %d%% full", 92, level=WARNING)
+
+    # An old-style decorator (overrides log() only, calls super().log()) works alone and inside a chain
+    class ShoutingLogger(LoggerDecorator):
+        def log(self, message):
+            super().log(message.upper())
+
+    class ListLogger(Logger):
+        def __init__(self):
+            self.lines = []
+
+        def emit(self, message, level=None):
+            self.lines.append(message)
+
+    ShoutingLogger(ConsoleLogger()).log("Old-style decorator")
+    sink = ListLogger()
+    ShoutingLogger(sink).log("alone")
+    ErrorLevelLogger(ShoutingLogger(sink)).log("in a chain")
+    compile_logger(ShoutingLogger(sink))("compiled")
+    assert sink.lines == ["ALONE", "[INFO] IN A CHAIN", "COMPILED"], sink.lines
+
+    # python 5_2_decorator_logger.py --benchmark
+    if "--benchmark" in sys.argv:
+        benchmark_file_loggers()
+
+    # python 5_2_decorator_logger.py --benchmark-rotation
+    if "--benchmark-rotation" in sys.argv:
+        benchmark_rotation()
+
+    # python 5_2_decorator_logger.py --multiprocess-stress-test
+    if "--multiprocess-stress-test" in sys.argv:
+        multiprocess_stress_test()
+
+    # python 5_2_decorator_logger.py --benchmark-json
+    if "--benchmark-json" in sys.argv:
+        benchmark_json_records()
+
+    # python 5_2_decorator_logger.py --benchmark-compiled
+    if "--benchmark-compiled" in sys.argv:
+        benchmark_compiled()
+
+    # python 5_2_decorator_logger.py --benchmark-levels
+    if "--benchmark-levels" in sys.argv:
+        benchmark_levels()
+
+    # python 5_2_decorator_logger.py --benchmark-clock
+    if "--benchmark-clock" in sys.argv:
+        benchmark_log_clock()
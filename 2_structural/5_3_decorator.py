@@ -1,7 +1,40 @@
 """
 From video: log the execution time of any function using a decorator.
 
+log_execution_time prints one line per call, which is fine for a slow function like prepare_dish.
+For hot functions use @profile instead: it records perf_counter_ns durations into per-function
+histograms and prints nothing until report() / export_json() is called.
+    - HDR-style buckets: 16 linear sub-buckets per power of two, so every percentile is within ~6%.
+    - Lock-free: every thread records into its own histogram; they are only merged when reporting.
+    - @profile(sample=N) times 1 in N calls (calls are still all counted).
+    - Coroutine functions are timed until they return, not until the coroutine object exists.
+      Generators and async generators are timed from the first next() until exhausted or closed,
+      and also record "<name> (first item)" and "<name> (per item)": the time the generator itself
+      spends producing items, excluding the consumer.
+
+@memoize caches results of expensive, pure-ish functions such as prepare_dish (sync or async):
+    - Bounded LRU (maxsize) with an optional per-entry ttl in seconds; typed=True keys 3 and 3.0 apart.
+    - Single-flight: concurrent calls with the same arguments wait for one computation instead of
+      repeating it. A failure is raised to everyone waiting on it and is not cached.
+    - wrapper.invalidate(*args, **kwargs), wrapper.clear() and wrapper.stats()
+      (hits, misses, evictions, expirations, coalesced, size).
+
+Span tracing shows where a request spends its time as a tree, not a flat list:
+    - with span("name"): ... or @traced nests spans through a ContextVar, so children are found
+      across asyncio tasks (which copy the context) and thread pools (via submit_in_context).
+    - dump_collapsed(filename) writes "outer;inner;leaf <self time in ns>" lines, the collapsed-stack
+      input of flamegraph.pl / speedscope.
+    - Off by default: until enable_tracing(), span() and @traced cost one global check.
 """
+import asyncio
+from collections import OrderedDict, defaultdict
+import contextvars
+import functools
+import inspect
+import json
+import os
+import sys
+import threading
 import time
 
 def log_execution_time(func):
@@ -11,22 +44,737 @@ def log_execution_time(func):
 
   def wrapper(*args, **kwargs):
     """
-    This function implements additional functionalities 
+    This function implements additional functionalities
     wrapping to original function
     """
 
-    start = time.time()
+    start = time.perf_counter()  # Monotonic and high resolution, unlike time.time()
     result = func(*args, **kwargs)
-    end = time.time()
+    end = time.perf_counter()
     print(f"The execution time of {func.__name__} was {end - start}")
     return result
 
   return wrapper
 
+# Histogram buckets: values below 32 ns get their own bucket, above that 16 per power of two
+SUB_BUCKET_BITS = 4
+BUCKETS = (64 - SUB_BUCKET_BITS) << SUB_BUCKET_BITS
+
+def bucket_index(duration_ns):
+  shift = max(duration_ns.bit_length() - SUB_BUCKET_BITS - 1, 0)
+  return (shift << SUB_BUCKET_BITS) + (duration_ns >> shift)
+
+def bucket_value(index):
+  """Midpoint of the durations that fall into bucket index."""
+  shift = max((index >> SUB_BUCKET_BITS) - 1, 0)
+  low = (index - (shift << SUB_BUCKET_BITS)) << shift
+  return low + ((1 << shift) - 1) // 2
+
+class Histogram:
+  """One thread's recordings for one function; only that thread writes to it."""
+  __slots__ = ("counts", "calls", "timed", "total", "max")
+
+  def __init__(self):
+    self.counts = [0] * BUCKETS
+    self.calls = 0  # Every call, sampled or not
+    self.timed = 0
+    self.total = 0
+    self.max = 0
+
+class FunctionStats:
+  """All threads' histograms for one profiled function."""
+  def __init__(self, name, sample=1):
+    self.name = name
+    self.sample = sample
+    self._local = threading.local()
+    self._histograms = []  # list.append is atomic; reporting reads whatever has been recorded so far
+
+  def histogram(self):
+    """The calling thread's histogram, created on first use."""
+    histogram = self._local.histogram = Histogram()
+    self._histograms.append(histogram)
+    return histogram
+
+  def start_call(self):
+    """Counts a call on this thread; True if it is the 1 in sample calls to time."""
+    try:
+      histogram = self._local.histogram
+    except AttributeError:
+      histogram = self.histogram()
+    histogram.calls += 1
+    return histogram.calls % self.sample == 0
+
+  def record(self, duration, count_call=False):
+    """Adds one timing; count_call for stats that are recorded without start_call() (the per-item ones)."""
+    try:
+      histogram = self._local.histogram
+    except AttributeError:
+      histogram = self.histogram()
+    histogram.calls += count_call
+    histogram.counts[bucket_index(duration)] += 1
+    histogram.timed += 1
+    histogram.total += duration
+    if duration > histogram.max:
+      histogram.max = duration
+
+  def summary(self):
+    counts = [0] * BUCKETS
+    calls = timed = total = longest = 0
+    for histogram in list(self._histograms):
+      for index, count in enumerate(histogram.counts):
+        if count:
+          counts[index] += count
+      calls += histogram.calls
+      timed += histogram.timed
+      total += histogram.total
+      longest = max(longest, histogram.max)
+
+    def percentile(fraction):
+      rank, seen = fraction * timed, 0
+      for index, count in enumerate(counts):
+        seen += count
+        if count and seen >= rank:
+          return min(bucket_value(index), longest)
+      return 0
+
+    return {"count": calls, "timed": timed, "mean_ns": total // timed if timed else 0,
+            "p50_ns": percentile(0.50), "p99_ns": percentile(0.99), "max_ns": longest}
+
+# Stats store: qualified function name -> FunctionStats
+profile_stats = {}
+
+def profile(func=None, *, sample=1):
+  """
+  @profile or @profile(sample=N). Records how long calls take (exceptions included) without printing.
+  Works on plain functions, coroutine functions, generators and async generators.
+  """
+  if func is None:
+    return lambda func: profile(func, sample=sample)
+
+  name = f"{func.__module__}.{func.__qualname__}"
+  stats = profile_stats[name] = FunctionStats(name, sample)
+  if inspect.iscoroutinefunction(func):
+    wrapper = _profile_coroutine(func, stats)
+  elif inspect.isgeneratorfunction(func) or inspect.isasyncgenfunction(func):
+    first_item = profile_stats[f"{name} (first item)"] = FunctionStats(f"{name} (first item)")
+    per_item = profile_stats[f"{name} (per item)"] = FunctionStats(f"{name} (per item)")
+    make_wrapper = _profile_generator if inspect.isgeneratorfunction(func) else _profile_async_generator
+    wrapper = make_wrapper(func, stats, first_item, per_item)
+  else:
+    wrapper = _profile_function(func, stats)
+  wrapper.__name__, wrapper.__qualname__, wrapper.__doc__ = func.__name__, func.__qualname__, func.__doc__
+  wrapper.stats = stats
+  return wrapper
+
+def _profile_function(func, stats):
+  local, new_histogram, clock, sample = stats._local, stats.histogram, time.perf_counter_ns, stats.sample
+
+  def wrapper(*args, **kwargs):
+    try:
+      histogram = local.histogram
+    except AttributeError:
+      histogram = new_histogram()
+    histogram.calls += 1
+    if sample != 1 and histogram.calls % sample:
+      return func(*args, **kwargs)
+    start = clock()
+    try:
+      return func(*args, **kwargs)
+    finally:
+      duration = clock() - start
+      # bucket_index(duration), inlined: this is the hot path
+      shift = duration.bit_length() - SUB_BUCKET_BITS - 1
+      histogram.counts[(shift << SUB_BUCKET_BITS) + (duration >> shift) if shift > 0 else duration] += 1
+      histogram.timed += 1
+      histogram.total += duration
+      if duration > histogram.max:
+        histogram.max = duration
+
+  return wrapper
+
+def _profile_coroutine(func, stats):
+  clock = time.perf_counter_ns
+
+  async def wrapper(*args, **kwargs):
+    if not stats.start_call():
+      return await func(*args, **kwargs)
+    start = clock()
+    try:
+      return await func(*args, **kwargs)
+    finally:
+      stats.record(clock() - start)
+
+  return wrapper
+
+def _profile_generator(func, stats, first_item, per_item):
+  clock = time.perf_counter_ns
+
+  def wrapper(*args, **kwargs):
+    if not stats.start_call():
+      return (yield from func(*args, **kwargs))
+    start = clock()
+    generator = func(*args, **kwargs)
+    resume, value, items = generator.send, None, 0
+    try:
+      while True:
+        before = clock()
+        try:
+          item = resume(value)
+        except StopIteration as stop:
+          return stop.value
+        after = clock()
+        per_item.record(after - before, True)
+        if not items:
+          first_item.record(after - start, True)
+        items += 1
+        try:
+          resume, value = generator.send, (yield item)
+        except GeneratorExit:
+          raise
+        except BaseException as exc:  # Thrown in by the consumer: pass it on to the generator
+          resume, value = generator.throw, exc
+    finally:
+      generator.close()
+      stats.record(clock() - start)
+
+  return wrapper
+
+def _profile_async_generator(func, stats, first_item, per_item):
+  clock = time.perf_counter_ns
+
+  async def wrapper(*args, **kwargs):
+    sampled = stats.start_call()
+    start = clock()
+    generator = func(*args, **kwargs)
+    resume, value, items = generator.asend, None, 0
+    try:
+      while True:
+        before = clock()
+        try:
+          item = await resume(value)
+        except StopAsyncIteration:
+          return
+        after = clock()
+        if sampled:
+          per_item.record(after - before, True)
+          if not items:
+            first_item.record(after - start, True)
+        items += 1
+        try:
+          resume, value = generator.asend, (yield item)
+        except GeneratorExit:
+          raise
+        except BaseException as exc:
+          resume, value = generator.athrow, exc
+    finally:
+      await generator.aclose()
+      if sampled:
+        stats.record(clock() - start)
+
+  return wrapper
+
+def report():
+  print(f"{'function':<45} {'count':>10} {'mean':>10} {'p50':>10} {'p99':>10} {'max':>10}  (ns)")
+  for name, stats in profile_stats.items():
+    s = stats.summary()
+    print(f"{name:<45} {s['count']:>10,} {s['mean_ns']:>10,} {s['p50_ns']:>10,} {s['p99_ns']:>10,} {s['max_ns']:>10,}")
+
+def export_json(filename=None):
+  """Summaries of every profiled function as JSON; also written to filename if given."""
+  text = json.dumps({name: stats.summary() for name, stats in profile_stats.items()}, indent=2)
+  if filename:
+    with open(filename, "w") as file:
+      file.write(text)
+  return text
+
+# Memoization: LRU + TTL storage shared by the sync and async wrappers
+class MemoCache:
+  """
+  Entries and counters for one memoized function. Callers hold lock around lookup(), store() and
+  the in_flight map; it is never held while the function runs.
+  """
+  def __init__(self, maxsize=128, ttl=None):
+    self.maxsize = maxsize  # None: unbounded
+    self.ttl = ttl
+    self.lock = threading.Lock()
+    self.in_flight = {}  # key -> computation other callers can wait on
+    self._entries = OrderedDict()  # key -> (value, expiry on the monotonic clock, or None)
+    self.hits = self.misses = self.evictions = self.expirations = self.coalesced = 0
+
+  def lookup(self, key):
+    """(True, value) for a fresh entry, marking it most recently used; otherwise (False, None)."""
+    entry = self._entries.get(key)
+    if entry is not None:
+      if entry[1] is None or entry[1] > time.monotonic():
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[0]
+      del self._entries[key]
+      self.expirations += 1
+    return False, None
+
+  def store(self, key, value):
+    self._entries[key] = (value, None if self.ttl is None else time.monotonic() + self.ttl)
+    self._entries.move_to_end(key)
+    if self.maxsize is not None and len(self._entries) > self.maxsize:
+      self._entries.popitem(last=False)
+      self.evictions += 1
+
+  def invalidate(self, key):
+    """Drops the entry; a computation already running for key will not be stored."""
+    with self.lock:
+      self.in_flight.pop(key, None)
+      return self._entries.pop(key, None) is not None
+
+  def clear(self):
+    with self.lock:
+      self.in_flight.clear()
+      self._entries.clear()
+
+  def stats(self):
+    with self.lock:
+      return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+              "expirations": self.expirations, "coalesced": self.coalesced, "size": len(self._entries)}
+
+class _Flight:
+  """One running computation of a sync memoized function."""
+  __slots__ = ("done", "value", "error")
+
+  def __init__(self):
+    self.done = threading.Event()
+    self.value = self.error = None
+
+_KWARGS_MARK = object()
+
+def make_key(args, kwargs, typed=False):
+  key = args
+  if kwargs:
+    key += (_KWARGS_MARK,) + tuple(kwargs.items())
+  if typed:
+    key += tuple(type(value) for value in args) + tuple(type(value) for value in kwargs.values())
+  return key
+
+def memoize(func=None, *, maxsize=128, ttl=None, typed=False):
+  """
+  @memoize or @memoize(maxsize=..., ttl=..., typed=...), on a plain or a coroutine function.
+  Arguments must be hashable.
+  """
+  if func is None:
+    return lambda func: memoize(func, maxsize=maxsize, ttl=ttl, typed=typed)
+
+  cache = MemoCache(maxsize, ttl)
+  make_wrapper = _memoize_coroutine if inspect.iscoroutinefunction(func) else _memoize_function
+  wrapper = make_wrapper(func, cache, typed)
+  wrapper.__name__, wrapper.__qualname__, wrapper.__doc__ = func.__name__, func.__qualname__, func.__doc__
+  wrapper.invalidate = lambda *args, **kwargs: cache.invalidate(make_key(args, kwargs, typed))
+  wrapper.clear, wrapper.stats, wrapper.cache = cache.clear, cache.stats, cache
+  return wrapper
+
+def _memoize_function(func, cache, typed):
+  lock, in_flight = cache.lock, cache.in_flight
+
+  def wrapper(*args, **kwargs):
+    key = make_key(args, kwargs, typed) if kwargs or typed else args
+    with lock:
+      found, value = cache.lookup(key)
+      if found:
+        return value
+      flight = in_flight.get(key)
+      if flight is None:
+        flight = in_flight[key] = _Flight()
+        cache.misses += 1
+        leader = True
+      else:
+        cache.coalesced += 1
+        leader = False
+    if not leader:
+      flight.done.wait()
+      if flight.error is not None:
+        raise flight.error
+      return flight.value
+    try:
+      flight.value = func(*args, **kwargs)
+      return flight.value
+    except BaseException as exc:
+      flight.error = exc
+      raise
+    finally:
+      with lock:
+        if in_flight.get(key) is flight:  # Not invalidated meanwhile
+          del in_flight[key]
+          if flight.error is None:
+            cache.store(key, flight.value)
+      flight.done.set()
+
+  return wrapper
+
+def _memoize_coroutine(func, cache, typed):
+  lock, in_flight = cache.lock, cache.in_flight
+
+  def finish(key, task):
+    with lock:
+      if in_flight.get(key) is task:
+        del in_flight[key]
+        if not task.cancelled() and task.exception() is None:
+          cache.store(key, task.result())
+
+  async def wrapper(*args, **kwargs):
+    key = make_key(args, kwargs, typed) if kwargs or typed else args
+    with lock:
+      found, value = cache.lookup(key)
+      if found:
+        return value
+      task = in_flight.get(key)
+      if task is None:
+        task = in_flight[key] = asyncio.ensure_future(func(*args, **kwargs))
+        task.add_done_callback(functools.partial(finish, key))
+        cache.misses += 1
+      else:
+        cache.coalesced += 1
+    return await asyncio.shield(task)  # A cancelled caller leaves the computation running for the others
+
+  return wrapper
+
+# Span tracing: the innermost open span of the current thread / task
+_current_span = contextvars.ContextVar("current_span", default=None)  # Holds that span's _SpanNode
+_tracing = False
+_clock = time.perf_counter_ns
+_span_local = threading.local()
+_span_roots = []  # Root _SpanNode of every thread's tree, plus stand-ins for other threads' spans
+
+class _SpanNode:
+  """
+  One collapsed stack path in one thread's tree. The path string is built once, when the node is
+  created; spans add their whole duration to total, and self times are worked out when reading.
+  """
+  __slots__ = ("path", "parent", "children", "total")
+
+  def __init__(self, path, parent):
+    self.path = path
+    self.parent = parent
+    self.children = {}
+    self.total = 0
+
+  def add(self, name):
+    return self.children.setdefault(name, _SpanNode(name if self.path is None else self.path + ";" + name, self))
+
+def _thread_root():
+  try:
+    return _span_local.root
+  except AttributeError:
+    root = _span_local.root = _SpanNode(None, None)
+    _span_roots.append(root)
+    return root
+
+class Span:
+  """A timed region; on exit its duration is added to its stack path in the current thread's tree."""
+  __slots__ = ("name", "node", "parent", "start")
+
+  def __init__(self, name):
+    self.name = name
+
+  def __enter__(self, get=_current_span.get, set=_current_span.set, clock=_clock):
+    self.parent = parent = get()
+    node = parent if parent is not None else _thread_root()
+    self.node = node = node.children.get(self.name) or node.add(self.name)
+    set(node)
+    self.start = clock()
+    return self
+
+  def __exit__(self, exc_type, exc, tb, set=_current_span.set, clock=_clock):
+    self.node.total += clock() - self.start
+    set(self.parent)
+
+class _NoSpan:
+  """What span() returns while tracing is off."""
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exc_type, exc, tb):
+    pass
+
+_NO_SPAN = _NoSpan()
+
+def span(name, new_span=object.__new__):
+  if not _tracing:
+    return _NO_SPAN
+  opened = new_span(Span)  # Span(name) without a Python-level __init__ call
+  opened.name = name
+  return opened
+
+def traced(func=None, *, name=None):
+  """@traced or @traced(name=...): runs every call of a plain or coroutine function in a span."""
+  if func is None:
+    return lambda func: traced(func, name=name)
+  name = name or func.__qualname__
+
+  if inspect.iscoroutinefunction(func):
+    async def wrapper(*args, **kwargs):
+      if not _tracing:
+        return await func(*args, **kwargs)
+      with Span(name):
+        return await func(*args, **kwargs)
+  else:
+    get, set, clock = _current_span.get, _current_span.set, _clock
+
+    def wrapper(*args, **kwargs):
+      if not _tracing:
+        return func(*args, **kwargs)
+      # Span.__enter__ / __exit__, inlined: this is the hot path
+      parent = get()
+      node = parent if parent is not None else _thread_root()
+      node = node.children.get(name) or node.add(name)
+      set(node)
+      start = clock()
+      try:
+        return func(*args, **kwargs)
+      finally:
+        node.total += clock() - start
+        set(parent)
+
+  wrapper.__name__, wrapper.__qualname__, wrapper.__doc__ = func.__name__, func.__qualname__, func.__doc__
+  return wrapper
+
+def submit_in_context(executor, fn, *args, **kwargs):
+  """executor.submit() that runs fn under the caller's current span (thread pools don't copy contexts)."""
+  return executor.submit(contextvars.copy_context().run, _run_in_thread, fn, *args, **kwargs)
+
+def _run_in_thread(fn, *args, **kwargs):
+  """Spans fn opens go into this thread's tree, under a stand-in for the caller's span."""
+  node = _current_span.get()
+  if node is not None:
+    try:
+      stand_ins = _span_local.stand_ins
+    except AttributeError:
+      stand_ins = _span_local.stand_ins = {}
+    stand_in = stand_ins.get(node)
+    if stand_in is None:
+      stand_in = stand_ins[node] = _SpanNode(node.path, node)  # Same path, so its children nest right
+      _span_roots.append(stand_in)
+    _current_span.set(stand_in)  # Only in this copied context
+  return fn(*args, **kwargs)
+
+def enable_tracing():
+  global _tracing
+  _tracing = True
+
+def disable_tracing():
+  global _tracing
+  _tracing = False
+
+def _span_nodes():
+  nodes = list(_span_roots)
+  for node in nodes:  # Grows while iterating: a breadth-first walk of every tree
+    nodes.extend(list(node.children.values()))
+  return nodes
+
+def span_totals():
+  """Collapsed stack -> self time in ns (its total minus its children's), merged over all threads."""
+  totals, children = defaultdict(int), defaultdict(int)
+  for node in _span_nodes():
+    if node.path is not None:
+      totals[node.path] += node.total
+      if node.parent.path is not None:
+        children[node.parent.path] += node.total
+  # Concurrent children (gather, thread pools) can add up to more than the parent's duration
+  return {path: max(total - children[path], 0) for path, total in totals.items()}
+
+def dump_collapsed(filename):
+  with open(filename, "w") as file:
+    for path, ns in sorted(span_totals().items()):
+      file.write(f"{path} {ns}\n")
+
+def reset_tracing():
+  for node in _span_nodes():
+    node.total = 0
+
+@memoize(maxsize=32, ttl=600)
 @log_execution_time
 def prepare_dish(name):
   print(f"Cooking {name}...")
   time.sleep(2) # preparing dish
   print(f"Dish {name} is ready")
 
-prepare_dish("Maxican rice")
\ No newline at end of file
+@traced
+@profile
+def chop(vegetable):
+  time.sleep(0.001)
+  return vegetable.lower()
+
+@traced
+@profile
+async def simmer(sauce):
+  await asyncio.sleep(0.01)
+  return f"{sauce} sauce"
+
+@profile
+def courses():
+  for course in ("starter", "main", "dessert"):
+    time.sleep(0.002)  # Plating
+    yield course
+
+@profile
+async def orders(count):
+  for number in range(count):
+    await asyncio.sleep(0.001)  # Waiting for the next ticket
+    yield number
+
+async def kitchen_pipeline():
+  async for number in orders(5):
+    await simmer(f"order {number}")
+    for course in courses():
+      time.sleep(0.001)  # Serving; consumer time, not counted in "courses (per item)"
+
+@memoize(ttl=30)
+async def fetch_menu(restaurant):
+  await asyncio.sleep(0.05)  # Slow menu service
+  return [f"{restaurant} special", "Maxican rice"]
+
+async def busy_evening():
+  menus = await asyncio.gather(*(fetch_menu("Casa") for _ in range(20)))  # One fetch, 19 coalesced
+  return len(menus)
+
+# A request through proxy -> chain -> facade -> decorators, traced across a thread pool and asyncio
+@traced(name="proxy")
+def handle_request(order, executor):
+  with span("chain"):
+    with span("validate"):
+      time.sleep(0.001)
+    with span("facade"):
+      futures = [submit_in_context(executor, chop, vegetable) for vegetable in ("Onion", "Tomato")]
+      for future in futures:
+        future.result()
+      asyncio.run(plate(order))
+
+@traced
+async def plate(order):
+  await asyncio.gather(simmer(f"order {order}"), garnish(order))
+
+@traced
+async def garnish(order):
+  with span("herbs"):
+    await asyncio.sleep(0.002)
+
+# Benchmark: cache-hit cost of @memoize next to functools.lru_cache, and single-flight under threads
+def benchmark_memoize(calls=1_000_000, threads=16):
+  def square(number):
+    return number * number
+
+  for label, function in (("functools.lru_cache", functools.lru_cache(maxsize=128)(square)),
+                          ("@memoize", memoize(square)),
+                          ("@memoize(ttl=60)", memoize(ttl=60)(square))):
+    function(7)
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+      function(7)
+    print(f"{label:<30} {(time.perf_counter_ns() - start) / calls:7.0f} ns/hit")
+
+  @memoize
+  def slow_square(number):
+    time.sleep(0.1)
+    return number * number
+
+  start = time.perf_counter()
+  workers = [threading.Thread(target=slow_square, args=(7,)) for _ in range(threads)]
+  for worker in workers:
+    worker.start()
+  for worker in workers:
+    worker.join()
+  print(f"{threads} threads, one 0.1 s computation: {time.perf_counter() - start:.2f} s, {slow_square.stats()}")
+
+# Benchmark: cost per span with tracing on and off
+def benchmark_tracing(spans=500_000):
+  def noop():
+    pass
+
+  def ns_per_span(function):
+    start = time.perf_counter_ns()
+    for _ in range(spans):
+      function()
+    return (time.perf_counter_ns() - start) / spans
+
+  def with_span():
+    with span("work"):
+      pass
+
+  traced_noop = traced(noop)
+  baseline = ns_per_span(noop)
+  for enabled in (False, True):
+    enable_tracing() if enabled else disable_tracing()
+    with span("benchmark"):  # Spans are nested one level deep
+      print(f"tracing {'on ' if enabled else 'off'} | with span()  {ns_per_span(with_span) - baseline:6.0f} ns/span"
+            f" | @traced  {ns_per_span(traced_noop) - baseline:6.0f} ns/span")
+  disable_tracing()
+  reset_tracing()
+
+# Benchmark: the profiler's own cost in ns per call, on a function that does nothing
+def benchmark_overhead(calls=1_000_000):
+  def noop():
+    pass
+
+  def ns_per_call(function):
+    start = time.perf_counter_ns()
+    for _ in range(calls):
+      function()
+    return (time.perf_counter_ns() - start) / calls
+
+  baseline = ns_per_call(noop)
+  for label, function in (("@profile", profile(noop)),
+                          ("@profile(sample=10)", profile(sample=10)(noop)),
+                          ("@profile(sample=100)", profile(sample=100)(noop))):
+    print(f"{label:<30} {ns_per_call(function) - baseline:7.0f} ns/call overhead")
+  print(f"(plain call: {baseline:.0f} ns)")
+
+  def items():
+    yield from range(calls)
+
+  def ns_per_item(generator_function):
+    start = time.perf_counter_ns()
+    for _ in generator_function():
+      pass
+    return (time.perf_counter_ns() - start) / calls
+
+  print(f"{'@profile generator':<30} {ns_per_item(profile(items)) - ns_per_item(items):7.0f} ns/item overhead")
+
+if __name__ == "__main__":
+  prepare_dish("Maxican rice")
+  prepare_dish("Maxican rice")  # Served from the cache: no cooking, no timing line
+  print(prepare_dish.stats())
+  asyncio.run(busy_evening())
+  print(fetch_menu.stats())
+
+  enable_tracing()
+  from concurrent.futures import ThreadPoolExecutor
+  with ThreadPoolExecutor(max_workers=2) as executor:
+    for order in range(3):
+      handle_request(order, executor)
+  disable_tracing()
+  dump_collapsed("trace_collapsed.txt")
+  with open("trace_collapsed.txt") as file:
+    print(file.read(), end="")
+  os.remove("trace_collapsed.txt")
+
+  for vegetable in ("Onion", "Tomato", "Pepper") * 10:
+    chop(vegetable)
+  asyncio.run(kitchen_pipeline())
+  report()
+
+  # The bucket math inlined in _profile_function must agree with bucket_index()
+  for seconds in (0, 0.00001, 0.0001, 0.001, 0.01):
+    sleep_stats = FunctionStats("sleep")
+    _profile_function(time.sleep, sleep_stats)(seconds)
+    histogram = sleep_stats._local.histogram
+    assert histogram.counts[bucket_index(histogram.max)] == 1, (seconds, histogram.max)
+  print(export_json())
+
+  # python 5_3_decorator.py --benchmark
+  if "--benchmark" in sys.argv:
+    benchmark_overhead()
+
+  # python 5_3_decorator.py --benchmark-tracing
+  if "--benchmark-tracing" in sys.argv:
+    benchmark_tracing()
+
+  # python 5_3_decorator.py --benchmark-memoize
+  if "--benchmark-memoize" in sys.argv:
+    benchmark_memoize()
@@ -14,8 +14,23 @@ Advantages
     ✅ Loose coupling between subject and observers.
     ✅ Easy to extend (add/remove observers dynamically).
     ✅ Improves modularity and maintainability.
+
+Concurrent fan-out (ThreadPoolNotifier):
+    notify_subscribers() calls update() one subscriber after another, so one slow subscriber delays
+    everyone and one exception stops the broadcast. With BlogWriter(name, notifier=ThreadPoolNotifier())
+    each subscriber gets a bounded mailbox drained by a pool of worker threads instead:
+    - An exception in update() is counted (and passed to on_error) without affecting other subscribers.
+    - A full mailbox either drops its oldest article ("drop_oldest") or makes the publisher wait ("block").
+    - Threads can't be interrupted, so a delivery slower than timeout is counted and moves its subscriber
+      to a separate slow lane with its own threads; fast subscribers keep the main lane to themselves.
+      One delivery within timeout moves it back.
 '''
 from abc import ABC, abstractmethod
+from collections import deque
+import queue
+import sys
+import threading
+import time
 
 # Observer Interface
 class Observer(ABC):
@@ -34,14 +49,159 @@ class User(Observer):  # Observer class
         print(f'For {self.name}, new article {article} by {blog_writer.name} is added')
 
 
+class Mailbox:
+    '''
+    Articles waiting for one subscriber. lock guards items and scheduled; at most one worker
+    holds a scheduled mailbox, so each subscriber gets its articles in order, one at a time.
+    '''
+    def __init__(self, subscriber, size):
+        self.subscriber = subscriber
+        self.items = deque()
+        self.size = size
+        self.lock = threading.Lock()
+        self.scheduled = False  # Sitting in a lane or being drained by a worker
+        self.slow = False
+        self.delivered = self.dropped = self.failed = self.timeouts = 0
+
+
+class ThreadPoolNotifier:
+    '''
+    Delivers each article through per-subscriber mailboxes (queue_size articles each) and two lanes
+    of worker threads: workers for the main lane, slow_workers for subscribers whose last update()
+    took longer than timeout seconds. A worker delivers at most batch articles from one mailbox
+    before putting it at the back of its lane.
+    '''
+    def __init__(self, workers=8, slow_workers=4, queue_size=100, policy="drop_oldest", timeout=0.05,
+                 batch=16, on_error=None):
+        if policy not in ("drop_oldest", "block"):
+            raise ValueError(f"Unknown policy {policy!r}")
+        if workers < 1 or slow_workers < 1:
+            raise ValueError("Both lanes need at least one worker thread")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.timeout = timeout
+        self.batch = batch
+        self.on_error = on_error
+        self._mailboxes = {}  # subscriber -> Mailbox
+        self._pending = 0  # Scheduled mailboxes, forgotten subscribers' included
+        self._idle = threading.Condition()  # Guards _pending; notified when it drops to 0
+        self._space = threading.Condition()  # Signalled when a delivery frees room (block policy)
+        self._lanes = (queue.SimpleQueue(), queue.SimpleQueue())  # (main, slow) queues of Mailboxes
+        self._lane_threads = (workers, slow_workers)
+        self._threads = [threading.Thread(target=self._work, args=(lane,), daemon=True)
+                         for lane, count in zip(self._lanes, self._lane_threads) for _ in range(count)]
+        for thread in self._threads:
+            thread.start()
+
+    def publish(self, subscribers, article, blog_writer):
+        for subscriber in subscribers:
+            mailbox = self._mailboxes.get(subscriber)
+            if mailbox is None:
+                mailbox = self._mailboxes[subscriber] = Mailbox(subscriber, self.queue_size)
+            self._post(mailbox, (article, blog_writer))
+
+    def _post(self, mailbox, item):
+        while True:
+            with mailbox.lock:
+                full = len(mailbox.items) >= mailbox.size
+                if not full or self.policy == "drop_oldest":
+                    if full:
+                        mailbox.items.popleft()
+                        mailbox.dropped += 1
+                    mailbox.items.append(item)
+                    schedule, mailbox.scheduled = not mailbox.scheduled, True
+                    break
+            with self._space:  # "block": wait until a worker takes an article off some mailbox
+                self._space.wait(0.01)
+        if schedule:
+            with self._idle:
+                self._pending += 1
+            self._lanes[mailbox.slow].put(mailbox)
+
+    def _work(self, lane):
+        while True:
+            mailbox = lane.get()
+            if mailbox is None:
+                break
+            drained = False
+            try:
+                for _ in range(self.batch):
+                    with mailbox.lock:
+                        if not mailbox.items:
+                            mailbox.scheduled = False
+                            drained = True
+                            break
+                        article, blog_writer = mailbox.items.popleft()
+                    self._deliver(mailbox, article, blog_writer)
+            finally:
+                if not drained:  # Still has articles: back of the line
+                    self._lanes[mailbox.slow].put(mailbox)
+            if drained:
+                with self._idle:
+                    self._pending -= 1
+                    if not self._pending:
+                        self._idle.notify_all()
+
+    def _deliver(self, mailbox, article, blog_writer):
+        start = time.perf_counter()
+        try:
+            mailbox.subscriber.update(article, blog_writer)
+            mailbox.delivered += 1
+        except BaseException as exc:  # Whatever a subscriber raises, the worker thread keeps going
+            mailbox.failed += 1
+            if self.on_error is not None:
+                try:
+                    self.on_error(mailbox.subscriber, exc)
+                except BaseException:
+                    pass
+        mailbox.slow = time.perf_counter() - start > self.timeout
+        mailbox.timeouts += mailbox.slow
+        if self.policy == "block":
+            with self._space:
+                self._space.notify_all()
+
+    def forget(self, subscriber):
+        '''
+        Drop the mailbox of an unsubscribed user (articles already queued are still delivered)
+        '''
+        self._mailboxes.pop(subscriber, None)
+
+    def join(self):
+        '''
+        Wait until every queued article has been delivered or dropped, including those queued for
+        subscribers that have since been forgotten
+        '''
+        with self._idle:
+            self._idle.wait_for(lambda: not self._pending)
+
+    def stats(self):
+        mailboxes = list(self._mailboxes.values())
+        return {"subscribers": len(mailboxes),
+                "delivered": sum(mailbox.delivered for mailbox in mailboxes),
+                "dropped": sum(mailbox.dropped for mailbox in mailboxes),
+                "dropped_slow_lane": sum(mailbox.dropped for mailbox in mailboxes if mailbox.slow),
+                "failed": sum(mailbox.failed for mailbox in mailboxes),
+                "timeouts": sum(mailbox.timeouts for mailbox in mailboxes),
+                "slow_lane": sum(mailbox.slow for mailbox in mailboxes)}
+
+    def close(self):
+        self.join()
+        for lane, count in zip(self._lanes, self._lane_threads):
+            for _ in range(count):
+                lane.put(None)
+        for thread in self._threads:
+            thread.join()
+
+
 class BlogWriter:
     '''
     This acts as a subject here(Article to be specific).
     BlogWriter class is useful to blog writer to add new article
     and manage subscribers as well
     '''
-    def __init__(self, name):
+    def __init__(self, name, notifier=None):
         self.name = name
+        self.notifier = notifier # None: notify subscribers one by one, in this thread
         self.__subscribers = [] # Subscribed Users will be added in this list
         self.__articles = [] # Article is the subject
 
@@ -68,6 +228,8 @@ class BlogWriter:
         '''
         User can unsubscribe from further notifications
         '''
+        if self.notifier is not None:
+            self.notifier.forget(subscriber)
         return self.__subscribers.remove(subscriber)
 
     def subscribers(self):
@@ -81,10 +243,60 @@ class BlogWriter:
         Notifying all the subsribers about new addition of an article
         i.e. Broadcast to all subscribers
         '''
+        if self.notifier is not None:
+            self.notifier.publish(self.__subscribers, article, self)
+            return
         for sub in self.__subscribers:
             sub.update(article, self)
 
 
+# Benchmark: delivery latency to 100k subscribers when 1% of them are slow
+class TimedUser(Observer):
+    '''
+    Records how long after publishing each article reached it
+    '''
+    published_at = {}
+
+    def __init__(self, latencies, delay=0.0):
+        self.latencies = latencies
+        self.delay = delay
+
+    def update(self, article, blog_writer):
+        self.latencies.append(time.perf_counter() - self.published_at[article])
+        if self.delay:
+            time.sleep(self.delay)
+
+
+def benchmark_fan_out(subscribers=100_000, slow_fraction=0.01, slow_delay=0.01, articles=5):
+    def percentiles(latencies):
+        latencies = sorted(latencies)
+        pick = lambda fraction: latencies[min(int(fraction * len(latencies)), len(latencies) - 1)] * 1000
+        return f"p50 {pick(0.5):8.1f} ms  p99 {pick(0.99):8.1f} ms  max {latencies[-1] * 1000:8.1f} ms"
+
+    every = int(1 / slow_fraction)
+    for label, notifier in (("serial", None),
+                            ("thread pool, drop_oldest", ThreadPoolNotifier(queue_size=16, slow_workers=32,
+                                                                            timeout=slow_delay / 2)),
+                            ("thread pool, block", ThreadPoolNotifier(queue_size=16, slow_workers=32,
+                                                                      timeout=slow_delay / 2, policy="block"))):
+        fast, slow = [], []
+        blog_writer = BlogWriter("Benchmark blog", notifier)
+        for i in range(subscribers):
+            blog_writer.subscribe(TimedUser(slow, slow_delay) if i % every == 0 else TimedUser(fast))
+        start = time.perf_counter()
+        for number in range(1 if notifier is None else articles):  # Serial: one article is slow enough
+            article = f"Article {number}"
+            TimedUser.published_at[article] = time.perf_counter()
+            blog_writer.add_article(article)
+        publish = time.perf_counter() - start
+        if notifier is not None:
+            notifier.join()
+            notifier.close()
+        print(f"{label:<25} publish {publish:6.2f} s | fast {percentiles(fast)} | slow {percentiles(slow)}")
+        if notifier is not None:
+            print(f"{'':<25} {notifier.stats()}")
+
+
 if __name__ == '__main__':
     blog_writer = BlogWriter('Hardik\'s blog')
     shailaja = User('Shailaja')
@@ -93,4 +305,21 @@ if __name__ == '__main__':
     blog_writer.subscribe(aarav)
     blog_writer.add_article('Article 1')
     blog_writer.unsubscribe(aarav)
-    blog_writer.add_article('Article 2')
\ No newline at end of file
+    blog_writer.add_article('Article 2')
+
+    # Concurrent fan-out: a failing subscriber no longer stops the others
+    class BrokenUser(User):
+        def update(self, article, blog_writer):
+            raise RuntimeError(f"{self.name}'s inbox is full")
+
+    notifier = ThreadPoolNotifier(workers=1, slow_workers=1, on_error=lambda subscriber, exc: print(f"Failed: {exc}"))
+    blog_writer = BlogWriter('Hardik\'s blog', notifier)
+    for subscriber in (BrokenUser('Bot'), shailaja, aarav):
+        blog_writer.subscribe(subscriber)
+    blog_writer.add_article('Article 3')
+    notifier.close()
+    print(notifier.stats())
+
+    # python 1_Observer_pattern.py --benchmark
+    if "--benchmark" in sys.argv:
+        benchmark_fan_out()
\ No newline at end of file